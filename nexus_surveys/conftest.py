@@ -0,0 +1,28 @@
+"""Shared fixtures for the tests next to the nexus_surveys modules.
+
+    python -m pytest nexus_surveys
+"""
+import pytest
+
+from nexus_schema import COLUMNS, build_response
+from nexus_storage import open_store
+
+
+def _make_response(suburb="Ascot", age=30, submission_id=None, **answers):
+    answers = {"suburb": suburb, "age": age, "gender": "Female", "employment_status": "Employed",
+               "land_use": "Residential", "challenges": ["Water shortages"], **answers}
+    return build_response(answers, submission_id=submission_id)
+
+
+@pytest.fixture
+def make_response():
+    """Build a valid response row; keyword arguments override its answers."""
+    return _make_response
+
+
+@pytest.fixture(params=["csv", "db"])
+def store(request, tmp_path):
+    """An empty store on each backend."""
+    store = open_store(str(tmp_path / f"responses.{request.param}"), COLUMNS)
+    store.ensure_exists()
+    return store
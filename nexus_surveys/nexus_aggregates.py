@@ -0,0 +1,198 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from nexus_encoding import MULTISELECT_OPTIONS, mask_column
+from nexus_schema import CATEGORY_COLUMNS, NUMBER_COLUMNS
+
+# Breakdowns kept in the cube. Age is kept exact so bands can be chosen at query time.
+DIMENSIONS = CATEGORY_COLUMNS + NUMBER_COLUMNS
+
+
+def parse_age_bands(text):
+    """Bands from their lower bounds, e.g. ``"0, 18, 25"`` -> ``[(0, 17), (18, 24), (25, 120)]``."""
+    try:
+        lows = sorted({int(part) for part in text.split(",") if part.strip()})
+    except ValueError:
+        raise ValueError(f"Age bands are comma-separated whole numbers, got {text!r}") from None
+    if not lows or lows[0] < 0 or lows[-1] >= 120:
+        raise ValueError(f"Age bands need lower bounds between 0 and 119, got {text!r}")
+    if lows[0] > 0:
+        lows.insert(0, 0)
+    return [(low, high - 1) for low, high in zip(lows, lows[1:])] + [(lows[-1], 120)]
+
+
+# Default bands for age charts and breakdowns, as lower bounds
+AGE_BANDS = parse_age_bands(os.environ.get("NEXUS_AGE_BANDS", "0, 18, 25, 35, 50, 65"))
+
+
+def age_band_label(band):
+    low, high = band
+    return f"{low}+" if high >= 120 else f"{low}-{high}"
+
+
+def age_bands(ages, bands=AGE_BANDS):
+    """Map ages onto band labels such as ``"25-34"``."""
+    edges = [low for low, _ in bands] + [bands[-1][1] + 1]
+    labels = [age_band_label(band) for band in bands]
+    return pd.cut(pd.Series(ages), bins=edges, labels=labels, right=False)
+
+
+def top_n(counts, n, other="Other"):
+    """The ``n`` largest counts, with the rest summed into one ``other`` entry."""
+    if len(counts) <= n:
+        return counts
+    counts = counts.sort_values(ascending=False)
+    rest = pd.Series([counts.iloc[n:].sum()], index=[other], dtype=counts.dtype)
+    return pd.concat([counts.iloc[:n], rest]).rename(counts.name)
+
+
+def one_hot(df, questions=None):
+    """Expand every question's bitmask into 0/1 option columns in one go."""
+    questions = [q for q in (questions or MULTISELECT_OPTIONS) if mask_column(q) in df.columns]
+    blocks, columns = [], []
+    for question in questions:
+        options = MULTISELECT_OPTIONS[question]
+        masks = df[mask_column(question)].to_numpy(dtype="int64")
+        blocks.append((masks[:, None] >> np.arange(len(options))) & 1)
+        columns.extend((question, option) for option in options)
+    values = np.hstack(blocks) if blocks else np.zeros((len(df), 0), dtype="int64")
+    return pd.DataFrame(values, index=df.index, columns=pd.MultiIndex.from_tuples(columns, names=["question", "option"]))
+
+
+class AggregateCube:
+    """Option counts for every multiselect question, broken down by respondent dimensions.
+
+    Each cell holds the counts for one combination of suburb, gender,
+    employment status, land use and age, so any breakdown or slice is a sum
+    over cells instead of a scan over responses. ``update`` folds new rows in
+    by adding into the cells they fall into, without recounting older rows.
+    Other breakdowns (e.g. submission day) can be passed as ``dimensions``.
+    """
+
+    def __init__(self, dimensions=None):
+        self.dimensions = list(dimensions or DIMENSIONS)
+        self.columns = pd.MultiIndex.from_tuples(
+            [(question, option) for question, options in MULTISELECT_OPTIONS.items() for option in options]
+            + [("_", "responses")],
+            names=["question", "option"],
+        )
+        self.rebuild(None)
+
+    @property
+    def cells(self):
+        if self._index is None:
+            return None
+        if self._cells is None:
+            self._cells = pd.DataFrame(self._values, index=self._index, columns=self.columns, copy=False)
+        return self._cells
+
+    @property
+    def nbytes(self):
+        return self._values.nbytes + (0 if self._index is None else self._index.memory_usage(deep=True))
+
+    def rebuild(self, df):
+        self._index = None
+        self._values = np.zeros((0, len(self.columns)), dtype="int64")
+        self._cells = None
+        self.update(df)
+
+    def counts(self, df):
+        """Per-row option picks plus a responses column of ones, in the cube's column order."""
+        values = one_hot(df).reindex(columns=self.columns[:-1], fill_value=0)
+        values[("_", "responses")] = 1
+        return values
+
+    def update(self, df, sign=1, values=None):
+        """Add ``df`` into the cells (or take it back out with ``sign=-1``); ``values`` reuses precomputed counts(df)."""
+        if df is None or df.empty:
+            return
+        values = self.counts(df) if values is None else values
+        keys = [self._dimension(df, dimension) for dimension in self.dimensions]
+        grouped = values.groupby(keys, dropna=False).sum() * sign
+        grouped.index.names = self.dimensions
+        self._add(grouped.index, grouped.to_numpy(dtype="int64"))
+
+    def merge(self, other):
+        """Add another cube's cells into this one (both must have the same dimensions)."""
+        if other._index is not None:
+            self._add(other._index, other._values)
+
+    def _add(self, index, values):
+        if self._index is None:
+            self._index, self._values = index, values.copy()
+        else:
+            # Add into the cells the new rows fall into and append any new cells
+            positions = self._index.get_indexer(index)
+            existing = positions >= 0
+            np.add.at(self._values, positions[existing], values[existing])
+            if not existing.all():
+                self._index = self._index.append(index[~existing])
+                self._values = np.vstack([self._values, values[~existing]])
+        self._cells = None
+
+    def slice(self, where=None, bands=AGE_BANDS):
+        """Cells matching ``where``, e.g. ``{"suburb": ["Ascot"], "age_band": ["18-24"]}``."""
+        if self.cells is None:
+            return None
+        cells = self.cells
+        for dimension, values in (where or {}).items():
+            if not values:
+                continue
+            if dimension == "age_band":
+                levels = age_bands(cells.index.get_level_values("age"), bands).astype(str)
+                cells = cells[levels.isin([str(value) for value in values]).to_numpy()]
+            else:
+                cells = cells[cells.index.get_level_values(dimension).isin(values)]
+        return cells
+
+    def question_counts(self, question, where=None):
+        cells = self.slice(where)
+        if cells is None:
+            return pd.Series(0, index=MULTISELECT_OPTIONS[question], dtype="int64")
+        return cells[question].sum().astype("int64")
+
+    def dimension_counts(self, dimension, where=None, bands=AGE_BANDS):
+        """Number of responses per value of ``dimension`` (or per ``"age_band"`` of ``bands``, in band order)."""
+        cells = self.slice(where, bands)
+        if cells is None or cells.empty:
+            return pd.Series(dtype="int64")
+        responses = cells[("_", "responses")]
+        if dimension == "age_band":
+            keys = age_bands(cells.index.get_level_values("age"), bands).to_numpy()
+            counts = responses.groupby(keys, observed=True).sum()
+        else:
+            counts = responses.groupby(level=dimension).sum()
+        # Cells emptied by removed rows stay in the cube with zero responses
+        return counts[counts > 0].rename("count")
+
+    def metrics(self, where=None):
+        """The five headline numbers shown on the dashboard."""
+        cells = self.slice(where)
+        if cells is None or cells.empty:
+            return {"total_responses": 0, "unique_suburbs": 0, "average_age": 0,
+                    "total_challenges": 0, "total_improvements": 0}
+        responses = cells[("_", "responses")]
+        ages = cells.index.get_level_values("age").to_numpy()
+        suburbs = responses.groupby(level="suburb").sum()
+        total = int(responses.sum())
+        return {
+            "total_responses": total,
+            "unique_suburbs": int((suburbs[suburbs.index != ""] > 0).sum()),
+            "average_age": int((ages * responses.to_numpy()).sum() / total) if total else 0,
+            "total_challenges": int((self.question_counts("challenges", where) > 0).sum()),
+            "total_improvements": int((self.question_counts("improvements", where) > 0).sum()),
+        }
+
+    def _dimension(self, df, dimension):
+        if dimension == "day":
+            # ISO timestamps start with the date
+            if "timestamp" not in df.columns:
+                return pd.Series("", index=df.index, name=dimension)
+            return df["timestamp"].astype(object).fillna("").astype(str).str[:10].rename(dimension)
+        if dimension not in df.columns:
+            return pd.Series(0 if dimension == "age" else "", index=df.index, name=dimension)
+        if dimension == "age":
+            return pd.to_numeric(df[dimension], errors="coerce").fillna(0).astype(int)
+        return df[dimension].astype(object).fillna("").astype(str)
@@ -0,0 +1,123 @@
+"""Headless survey analytics.
+
+Produces the numbers behind the analysis dashboard without Streamlit, e.g.
+for a nightly report:
+
+    python nexus_surveys/nexus_analytics.py nexus_surveys/databases/nexus_survey_data/responses.csv \
+        --json summary.json --parquet summary.parquet
+
+``--where suburb=Ascot,Hillside`` restricts the numbers to matching
+responses. On the SQLite store the filter runs in SQL on the indexed
+columns, so only those rows are read.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from nexus_aggregates import AggregateCube, age_bands
+from nexus_audit import visible_chunks
+from nexus_encoding import MULTISELECT_OPTIONS
+from nexus_loader import prepare_frame
+from nexus_schema import CATEGORY_COLUMNS, NUMBER_COLUMNS
+from nexus_storage import open_store
+
+BREAKDOWNS = CATEGORY_COLUMNS + ["age_band"]
+
+
+def build_cube(store, chunksize=50000, filters=None):
+    """Fold the store, or the rows matching ``filters``, into an aggregate cube one chunk at a time."""
+    cube = AggregateCube()
+    for chunk in visible_chunks(store, chunksize, filters=filters):
+        cube.update(prepare_frame(chunk))
+    return cube
+
+
+def parse_where(conditions):
+    """Turn ``["suburb=Ascot,Hillside", "age=30"]`` into ``{"suburb": ["Ascot", "Hillside"], "age": [30]}``."""
+    filters = {}
+    for condition in conditions:
+        column, _, values = condition.partition("=")
+        if column not in CATEGORY_COLUMNS + NUMBER_COLUMNS or not values:
+            raise ValueError(f"expected <column>=<value>[,<value>...] on one of {', '.join(CATEGORY_COLUMNS + NUMBER_COLUMNS)}, got {condition!r}")
+        values = [value.strip() for value in values.split(",")]
+        if column in NUMBER_COLUMNS:
+            values = [int(value) for value in values]
+        filters.setdefault(column, []).extend(values)
+    return filters
+
+
+def question_table(cube):
+    """Option counts per question for the whole data set and for every breakdown value, in long format."""
+    columns = ["breakdown", "group", "question", "option", "count"]
+    if cube.cells is None:
+        return pd.DataFrame(columns=columns)
+    cells = cube.cells.drop(columns=[("_", "responses")])
+    tables = [cells.sum().to_frame().T.assign(breakdown="all", group="")]
+    for breakdown in BREAKDOWNS:
+        if breakdown == "age_band":
+            keys = age_bands(cells.index.get_level_values("age")).to_numpy()
+            grouped = cells.groupby(keys, observed=True).sum()
+        else:
+            grouped = cells.groupby(level=breakdown).sum()
+        tables.append(grouped.assign(breakdown=breakdown, group=grouped.index.astype(str)))
+    table = pd.concat(tables, ignore_index=True).set_index(["breakdown", "group"])
+    table.columns = pd.MultiIndex.from_tuples(table.columns, names=["question", "option"])
+    table = table.stack(["question", "option"], future_stack=True).rename("count").reset_index()
+    return table[columns].astype({"count": "int64"})
+
+
+def summarize(cube):
+    """The dashboard's metric cards, question charts and breakdown counts as plain dicts."""
+    summary = {
+        "metrics": cube.metrics(),
+        "questions": {},
+        "breakdowns": {},
+    }
+    for question in MULTISELECT_OPTIONS:
+        counts = cube.question_counts(question)
+        summary["questions"][question] = {option: int(count) for option, count in counts.items()}
+    for breakdown in BREAKDOWNS:
+        counts = cube.dimension_counts(breakdown)
+        summary["breakdowns"][breakdown] = {str(key): int(count) for key, count in counts.items()}
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the Nexus survey dashboard numbers without Streamlit.")
+    parser.add_argument("responses", help="responses file (.csv, or .db for the SQLite store)")
+    parser.add_argument("--json", dest="json_path", help="write the summary as JSON to this path ('-' for stdout)")
+    parser.add_argument("--parquet", dest="parquet_path", help="write the long-format question counts as Parquet")
+    parser.add_argument("--chunksize", type=int, default=50000, help="rows read per chunk (default: 50000)")
+    parser.add_argument("--where", action="append", default=[], metavar="COLUMN=VALUE[,VALUE]",
+                        help="only count responses with one of these values, matched exactly as stored (repeatable)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.responses):
+        parser.error(f"responses file not found: {args.responses}")
+    try:
+        filters = parse_where(args.where)
+    except ValueError as e:
+        parser.error(str(e))
+    cube = build_cube(open_store(args.responses, []), args.chunksize, filters)
+
+    summary = summarize(cube)
+    summary["source"] = args.responses
+    if filters:
+        summary["where"] = filters
+    summary["generated_at"] = datetime.now().isoformat()
+    if args.json_path == "-" or (args.json_path is None and args.parquet_path is None):
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    elif args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if args.parquet_path:
+        question_table(cube).to_parquet(args.parquet_path, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Append-only audit log of admin changes to the response store.
+
+Deleting a response or clearing the database never touches the store.
+Instead an entry goes on ``<responses file>.audit.jsonl``. A ``delete``
+entry is a tombstone for one row, and a ``truncate`` entry hides every row
+before a position. Rows are numbered by their position in the store,
+counting from 0. Both take constant time whatever the store's size. They
+don't hold the store's lock, so respondents are never blocked, and an
+``undo`` entry reverses the latest change.
+
+``compact`` reclaims the space later. It rewrites the store without the
+hidden rows and logs a ``compact`` entry as the rewrite is committed.
+Positions restart from that entry and the changes before it can no longer be
+undone.
+
+    python nexus_surveys/nexus_audit.py compact nexus_surveys/databases/nexus_survey_data/responses.csv
+"""
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from nexus_storage import file_lock, open_store
+
+
+class AuditLog:
+    """Soft deletes, truncations and undos for one store, applied when its rows are read."""
+
+    def __init__(self, store):
+        self.store = store
+        self.path = store.path + ".audit.jsonl"
+        self._state = None
+
+    def delete(self, positions, by="dashboard"):
+        """Hide the rows at ``positions``."""
+        return self._append({"op": "delete", "rows": [int(position) for position in positions], "by": by})
+
+    def truncate(self, rows, by="dashboard"):
+        """Hide every row before position ``rows``, i.e. everything stored when the view was taken."""
+        return self._append({"op": "truncate", "before": int(rows), "by": by})
+
+    def undo(self, by="dashboard"):
+        """Reverse the latest change that hasn't been undone; returns its entry or None."""
+        with file_lock(self.path):
+            active = self._active(self._entries())
+            if not active:
+                return None
+            target = active[-1]
+            self._write({"op": "undo", "target": target["seq"], "by": by}, self._entries())
+            return target
+
+    def history(self):
+        """Changes since the last compaction that are still in effect, oldest first."""
+        return self._active(self._entries())
+
+    def state(self):
+        """``(floor, deleted)``: rows before ``floor`` and the positions in ``deleted`` are hidden."""
+        try:
+            stat = os.stat(self.path)
+            key = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            return 0, frozenset()
+        # The log only ever grows, so its size and mtime tell whether it changed
+        if self._state is None or self._state[0] != key:
+            floor, deleted = 0, set()
+            for entry in self._active(self._entries()):
+                if entry["op"] == "truncate":
+                    floor = max(floor, entry["before"])
+                else:
+                    deleted.update(entry["rows"])
+            self._state = (key, (floor, frozenset(deleted)))
+        return self._state[1]
+
+    def visible(self, positions):
+        """Boolean mask of which row ``positions`` are visible."""
+        positions = np.asarray(positions)
+        floor, deleted = self.state()
+        mask = positions >= floor
+        if deleted:
+            mask &= ~np.isin(positions, np.fromiter(deleted, dtype="int64"))
+        return mask
+
+    def compact(self):
+        """Physically drop the hidden rows from the store and return how many were removed."""
+        with file_lock(self.path):
+            floor, deleted = self.state()
+            if not floor and not deleted:
+                return 0
+            # The compact entry is logged before the store is swapped, so a crash in between
+            # can only bring hidden rows back, never hide the wrong ones
+            return self.store.retain(
+                self.visible,
+                before_commit=lambda removed: self._write({"op": "compact", "removed": removed}, self._entries()),
+            )
+
+    def _append(self, entry):
+        with file_lock(self.path):
+            return self._write(entry, self._entries())
+
+    def _write(self, entry, entries):
+        entry = {"seq": len(entries) + 1, "at": datetime.now().isoformat(), **entry}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return entry
+
+    def _entries(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _active(self, entries):
+        # Entries since the last compaction, minus undone ones
+        for start in range(len(entries) - 1, -1, -1):
+            if entries[start]["op"] == "compact":
+                entries = entries[start + 1:]
+                break
+        undone = {entry["target"] for entry in entries if entry["op"] == "undo"}
+        return [entry for entry in entries if entry["op"] in ("delete", "truncate") and entry["seq"] not in undone]
+
+
+def visible_chunks(store, chunksize=50000, encoded=True, filters=None):
+    """Like ``store.iter_chunks`` but without the rows hidden in the audit log."""
+    audit = AuditLog(store)
+    for chunk in store.iter_chunks(chunksize, encoded, filters):
+        # Chunks are indexed by store position, so filtered reads are checked against the right rows
+        mask = audit.visible(chunk.index)
+        yield chunk if mask.all() else chunk[mask]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("compact", "history"):
+        sys.exit("usage: nexus_audit.py compact|history <responses file>")
+    audit = AuditLog(open_store(sys.argv[2], []))
+    if sys.argv[1] == "compact":
+        print(f"Removed {audit.compact()} hidden responses from {sys.argv[2]}")
+    else:
+        for entry in audit.history():
+            print(json.dumps(entry))
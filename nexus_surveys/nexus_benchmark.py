@@ -0,0 +1,152 @@
+"""Benchmarks for the submit path and the analysis dashboard.
+
+Generates synthetic responses at several sizes, times the hot paths and
+compares them with a stored baseline:
+
+    python nexus_surveys/nexus_benchmark.py                      # 10k and 100k responses
+    python nexus_surveys/nexus_benchmark.py --sizes 10000 1000000
+    python nexus_surveys/nexus_benchmark.py --save-baseline      # after an intended change
+
+Timings are machine dependent, so save the baseline on the machine the
+benchmarks are compared on. Exits with status 1 if anything regressed.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from nexus_crosstab import crosstab
+from nexus_encoding import MULTISELECT_OPTIONS
+from nexus_loader import ResponseCache
+from nexus_queue import SubmissionQueue
+from nexus_snapshot import compact, snapshot_path_for
+from nexus_storage import open_store
+from nexus_synthetic import HEADERS, generate_responses, write_responses
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+
+
+def timed(function, repeat=1):
+    """Median wall time of ``function`` in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def bench_size(size, workdir, backends, seed=0):
+    results = {}
+    responses = generate_responses(size, seed)
+    new_rows = generate_responses(200, seed + 1).to_dict("records")
+    queued_rows = generate_responses(100, seed + 2).to_dict("records")
+
+    for backend in backends:
+        path = os.path.join(workdir, f"responses_{size}.{backend}")
+        write_responses(responses, path)
+        store = open_store(path, HEADERS)
+        rows = iter(new_rows)
+        results[f"submit_append_{backend}"] = timed(lambda: store.append(next(rows)), repeat=100)
+        # What the form does on submit, and the background writer's batch of 100 submits
+        queue = SubmissionQueue(store)
+        rows = iter(queued_rows)
+        results[f"submit_queue_{backend}"] = timed(lambda: queue.submit(next(rows)), repeat=100)
+        results[f"queue_flush_{backend}"] = timed(queue.flush)
+
+    store = open_store(os.path.join(workdir, f"responses_{size}.csv"), HEADERS)
+    results["load_full"] = timed(lambda: ResponseCache(store).refresh())
+    snapshot_path = snapshot_path_for(store.path)
+    compact(store, snapshot_path)
+    results["load_snapshot"] = timed(lambda: ResponseCache(store, snapshot_path).refresh())
+
+    cache = ResponseCache(store)
+    cache.refresh()
+    rows = iter(new_rows[100:])
+
+    def refresh_tail():
+        store.append(next(rows))
+        cache.refresh()
+
+    results["refresh_tail"] = timed(refresh_tail, repeat=20)
+
+    # Every chart on the dashboard reads one question's counts from the cube
+    results["chart_aggregation"] = timed(
+        lambda: [cache.cube.question_counts(question) for question in MULTISELECT_OPTIONS], repeat=5
+    ) / len(MULTISELECT_OPTIONS)
+    results["metric_cards"] = timed(cache.cube.metrics, repeat=5)
+
+    df, version = cache.refresh()
+    index = cache.filter_index(df, version)
+    suburb = df["suburb"].iloc[0]
+    filters = {"suburb": [suburb], "challenges": ["Water shortages", "High unemployment"], "land_use": ["Residential"]}
+    results["filter_and"] = timed(lambda: index.apply(df, filters), repeat=5)
+    results["filter_or"] = timed(lambda: index.apply(df, filters, how="or"), repeat=5)
+    results["crosstab"] = timed(lambda: crosstab(df, "challenges", "suburb"), repeat=5)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return ``(size, metric, baseline ms, current ms)`` for every metric slower than the baseline allows."""
+    regressions = []
+    for size, metrics in results.items():
+        for metric, current in metrics.items():
+            previous = baseline.get(size, {}).get(metric)
+            # Ignore sub-millisecond jitter
+            if previous is not None and current > previous * (1 + tolerance) and current - previous > 1:
+                regressions.append((size, metric, previous, current))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Nexus survey submit and dashboard paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="response counts to benchmark")
+    parser.add_argument("--backends", nargs="+", default=["csv", "db"], choices=["csv", "db"], help="stores to time submits on")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before reporting a regression (default: 0.25)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="nexus_benchmark_")
+    results = {}
+    try:
+        for size in args.sizes:
+            results[str(size)] = bench_size(size, workdir, args.backends)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    metrics = list(next(iter(results.values())))
+    print(f"{'metric (ms)':<24}" + "".join(f"{size:>12}" for size in results))
+    for metric in metrics:
+        print(f"{metric:<24}" + "".join(f"{results[size][metric]:>12.2f}" for size in results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --save-baseline to create one.")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for size, metric, previous, current in regressions:
+        print(f"REGRESSION {metric} at {size} responses: {previous:.2f} ms -> {current:.2f} ms")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
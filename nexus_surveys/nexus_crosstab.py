@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from nexus_encoding import MULTISELECT_OPTIONS, mask_column
+
+
+def indicator(df, column):
+    """Return ``(matrix, labels)`` where ``matrix`` is the rows x options 0/1 indicator for ``column``.
+
+    Multiselect questions are expanded from their bitmask. Single-choice
+    columns come back as a 1-D array of category codes instead, which is the
+    compact form of a one-hot matrix with exactly one 1 per row.
+    """
+    if column in MULTISELECT_OPTIONS:
+        options = MULTISELECT_OPTIONS[column]
+        masks = df[mask_column(column)].to_numpy(dtype="int64")
+        return ((masks[:, None] >> np.arange(len(options))) & 1).astype("float64"), pd.Index(options)
+    codes, labels = pd.factorize(df[column], sort=True)
+    return codes, pd.Index(labels)
+
+
+def crosstab(df, row, column):
+    """Count responses for every (row option, column option) pair.
+
+    Two multiselect questions are multiplied as indicator matrices
+    (``A.T @ B``); a single-choice column is folded in with ``bincount`` on
+    its category codes, so no one-hot matrix is built for wide columns like
+    suburb and no Python loop runs over responses.
+    """
+    a, row_labels = indicator(df, row)
+    b, column_labels = indicator(df, column)
+    if a.ndim == 2 and b.ndim == 2:
+        table = a.T @ b
+    elif a.ndim == 1 and b.ndim == 1:
+        valid = (a >= 0) & (b >= 0)
+        pairs = a[valid] * len(column_labels) + b[valid]
+        table = np.bincount(pairs, minlength=len(row_labels) * len(column_labels)).reshape(len(row_labels), len(column_labels))
+    elif a.ndim == 1:
+        table = _grouped_sums(a, b, len(row_labels))
+    else:
+        table = _grouped_sums(b, a, len(column_labels)).T
+    return pd.DataFrame(table.astype("int64"), index=row_labels.rename(row), columns=column_labels.rename(column))
+
+
+def cap_table(table, n, other="Other"):
+    """Keep the ``n`` largest rows and columns of a count table, summing the rest into ``other``."""
+    if len(table) > n:
+        totals = table.sum(axis=1).sort_values(ascending=False)
+        kept = table.loc[totals.index[:n]]
+        table = pd.concat([kept, table.loc[totals.index[n:]].sum().to_frame(other).T]).rename_axis(table.index.name)
+    if len(table.columns) > n:
+        totals = table.sum().sort_values(ascending=False)
+        kept = table[totals.index[:n]]
+        table = kept.assign(**{other: table[totals.index[n:]].sum(axis=1)}).rename_axis(columns=table.columns.name)
+    return table
+
+
+def cooccurrence(df, question):
+    """Option-by-option co-occurrence within one multiselect question (diagonal = option counts)."""
+    return crosstab(df, question, question)
+
+
+def _grouped_sums(codes, matrix, groups):
+    # Sum each option column per category code
+    valid = codes >= 0
+    table = np.zeros((groups, matrix.shape[1]))
+    for j in range(matrix.shape[1]):
+        table[:, j] = np.bincount(codes[valid], weights=matrix[valid, j], minlength=groups)
+    return table
@@ -0,0 +1,98 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Option lists come from the survey schema; an option's code is its position in its list
+from nexus_schema import MULTISELECT_OPTIONS, SEPARATOR, SINGLE_CHOICE_OPTIONS  # noqa: F401
+
+
+def mask_column(question):
+    return f"{question}_mask"
+
+
+def split_answer(text, options, keep_unknown=False):
+    """Split a comma-joined answer back into options.
+
+    Pieces are re-joined until they match a known option, so options that
+    themselves contain ", " survive the round trip. Pieces that match no
+    option are dropped, or with ``keep_unknown`` returned as they are (cut
+    as soon as no option could still match) so validation can report them.
+    """
+    pieces = [piece.strip() for piece in str(text).split(SEPARATOR)]
+    known = set(options)
+    selected, current = [], None
+    for piece in pieces:
+        current = piece if current is None else current + SEPARATOR + piece
+        if current in known or (keep_unknown and not any(option.startswith(current + SEPARATOR) for option in options)):
+            selected.append(current)
+            current = None
+    if keep_unknown and current is not None:
+        selected.append(current)
+    return selected
+
+
+def encode_answer(answer, options):
+    """Turn a list of options, a comma-joined string or an existing mask into a bitmask."""
+    if answer is None or (isinstance(answer, float) and np.isnan(answer)):
+        return 0
+    if isinstance(answer, (int, np.integer)):
+        return int(answer)
+    if isinstance(answer, str):
+        return _encode_text(answer, tuple(options))
+    codes = {option: code for code, option in enumerate(options)}
+    mask = 0
+    for option in answer:
+        if option in codes:
+            mask |= 1 << codes[option]
+    return mask
+
+
+@lru_cache(maxsize=4096)
+def _encode_text(text, options):
+    # Answers repeat a lot, so each distinct string is only parsed once
+    if text.strip().isdigit():
+        return int(text)
+    return encode_answer(split_answer(text, options), options)
+
+
+def decode_mask(mask, options):
+    return [option for code, option in enumerate(options) if int(mask) >> code & 1]
+
+
+def options_mask(selected, question):
+    return encode_answer(list(selected), MULTISELECT_OPTIONS[question])
+
+
+def encode_column(series, question):
+    # Each distinct answer string is parsed once, then mapped onto every row
+    options = MULTISELECT_OPTIONS[question]
+    series = series.fillna("")
+    uniques = series.unique()
+    lookup = {value: encode_answer(value, options) for value in uniques}
+    return series.map(lookup).astype("int64")
+
+
+def decode_column(masks, question):
+    options = MULTISELECT_OPTIONS[question]
+    masks = masks.fillna(0).astype("int64")
+    lookup = {mask: SEPARATOR.join(decode_mask(mask, options)) for mask in masks.unique()}
+    return masks.map(lookup)
+
+
+def encode_frame(df):
+    """Add an integer ``<question>_mask`` column for every multiselect question in ``df``."""
+    df = df.copy()
+    for question in MULTISELECT_OPTIONS:
+        if question in df.columns and mask_column(question) not in df.columns:
+            df[mask_column(question)] = encode_column(df[question], question)
+    return df
+
+
+def option_counts(masks, question):
+    """Count how many rows picked each option of ``question``."""
+    options = MULTISELECT_OPTIONS[question]
+    values = np.asarray(masks, dtype="int64")
+    bits = (values[:, None] >> np.arange(len(options))) & 1
+    return pd.Series(bits.sum(axis=0), index=options, dtype="int64")
+
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from nexus_encoding import MULTISELECT_OPTIONS, mask_column, options_mask
+from nexus_schema import CATEGORY_COLUMNS, NUMBER_COLUMNS
+
+
+class FilterIndex:
+    """Exact-match row selection over a loaded response frame.
+
+    Multiselect questions are tested against their bitmask columns and
+    single-choice columns are turned into integer category codes once, so a
+    filter is a handful of integer comparisons per row rather than a regex
+    scan. Options are matched exactly, so "Job training programs" under
+    improvements never matches commercial_support rows.
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.masks = {
+            question: df[mask_column(question)].to_numpy(dtype="int64")
+            for question in MULTISELECT_OPTIONS if mask_column(question) in df.columns
+        }
+        self.codes = {}
+        # Single-choice and numeric columns are filtered on by exact value
+        for column in CATEGORY_COLUMNS + NUMBER_COLUMNS:
+            if column in df.columns:
+                codes, categories = pd.factorize(df[column], use_na_sentinel=True)
+                self.codes[column] = (codes, pd.Index(categories))
+
+    def rows(self, column, selected, match="any"):
+        """Boolean row selector for one question.
+
+        ``match="any"`` keeps rows that picked at least one of ``selected``;
+        ``match="all"`` keeps rows that picked every one of them (multiselect only).
+        """
+        if column in self.masks:
+            wanted = options_mask(selected, column)
+            if match == "all":
+                return (self.masks[column] & wanted) == wanted
+            return (self.masks[column] & wanted) != 0
+        if column in self.codes:
+            codes, categories = self.codes[column]
+            wanted = categories.get_indexer(pd.Index(list(selected)))
+            return np.isin(codes, wanted[wanted >= 0])
+        raise KeyError(f"Cannot filter on unknown column: {column}")
+
+    def select(self, filters, how="and", match="any"):
+        """Combine per-question selections; ``filters`` maps a column to the chosen options."""
+        selectors = [self.rows(column, selected, match) for column, selected in filters.items() if selected]
+        if not selectors:
+            return np.ones(self.size, dtype=bool)
+        if how == "or":
+            return np.logical_or.reduce(selectors)
+        return np.logical_and.reduce(selectors)
+
+    def apply(self, df, filters, how="and", match="any"):
+        return df[self.select(filters, how, match)]
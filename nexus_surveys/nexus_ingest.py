@@ -0,0 +1,89 @@
+"""Bulk ingest of survey responses collected offline.
+
+Field teams export batches as CSV (the same columns as responses.csv) or
+JSONL (one response object per line, multiselect answers as lists or
+comma-joined text). Every response is validated against the survey schema
+and must carry its client-generated ``submission_id``; responses already in
+the store are skipped, so re-uploading a batch is safe:
+
+    python nexus_surveys/nexus_ingest.py batch.jsonl more.csv --store nexus_surveys/databases/nexus_survey_data/responses.csv
+
+If any response is invalid nothing is written, unless --skip-invalid is given.
+"""
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+from nexus_reference import load_suburbs, normalise_name
+from nexus_schema import COLUMNS, ID_COLUMN, validate_response
+from nexus_storage import open_store
+
+DEFAULT_STORE = os.environ.get("NEXUS_RESPONSES_PATH", "nexus_surveys/databases/nexus_survey_data/responses.csv")
+
+
+def read_batch(path):
+    """Return the responses in a CSV or JSONL file as a list of dicts."""
+    if os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return pd.read_csv(path, dtype=str, keep_default_na=False).to_dict("records")
+
+
+def check_batch(responses, suburbs=None):
+    """Split a batch into valid responses and ``(position, errors)`` for the rest."""
+    valid, rejected = [], []
+    for position, response in enumerate(responses, start=1):
+        response = dict(response)
+        if isinstance(response.get("suburb"), str):
+            response["suburb"] = normalise_name(response["suburb"])
+        errors = validate_response(response, suburbs)
+        if not response.get(ID_COLUMN):
+            errors.append(f"{ID_COLUMN}: missing")
+        if not response.get("timestamp"):
+            errors.append("timestamp: missing")
+        if errors:
+            rejected.append((position, errors))
+        else:
+            valid.append(response)
+    return valid, rejected
+
+
+def ingest(store, responses, suburbs=None, skip_invalid=False):
+    """Validate ``responses`` and write the new ones to ``store`` in a single batch.
+
+    Returns ``(written, duplicates, rejected)``. Nothing is written when a
+    response is invalid, unless ``skip_invalid`` is set.
+    """
+    valid, rejected = check_batch(responses, suburbs)
+    if rejected and not skip_invalid:
+        return 0, 0, rejected
+    store.ensure_exists()
+    written = store.append_many(valid, dedupe=True)
+    return written, len(valid) - written, rejected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest batches of offline Nexus survey responses.")
+    parser.add_argument("batches", nargs="+", help="CSV or JSONL files of responses")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="responses file to write to (.csv or .db)")
+    parser.add_argument("--skip-invalid", action="store_true", help="write the valid responses even if some are invalid")
+    args = parser.parse_args(argv)
+
+    responses = []
+    for path in args.batches:
+        responses.extend(read_batch(path))
+    written, duplicates, rejected = ingest(open_store(args.store, COLUMNS), responses, load_suburbs(), args.skip_invalid)
+    for position, errors in rejected[:20]:
+        print(f"response {position}: " + "; ".join(errors), file=sys.stderr)
+    if len(rejected) > 20:
+        print(f"... and {len(rejected) - 20} more invalid responses", file=sys.stderr)
+    if rejected and not args.skip_invalid:
+        sys.exit(f"{len(rejected)} of {len(responses)} responses are invalid; nothing was written (use --skip-invalid to write the rest)")
+    print(f"Wrote {written} responses to {args.store} ({duplicates} already stored, {len(rejected)} invalid)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from nexus_aggregates import AggregateCube
+from nexus_audit import AuditLog
+from nexus_encoding import MULTISELECT_OPTIONS, mask_column
+from nexus_filters import FilterIndex
+from nexus_metrics import timed
+from nexus_reference import normalise_name
+from nexus_schema import CATEGORY_COLUMNS, NUMBER_COLUMNS, TEXT_COLUMNS
+from nexus_trends import trend_cube
+
+
+def prepare_frame(df):
+    """Coerce freshly read rows into the dtypes the dashboard expects."""
+    for column in TEXT_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].fillna('').astype(str)
+    for column in NUMBER_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype(int)
+    return normalise_suburbs(df)
+
+
+def normalise_suburbs(df):
+    """Clean stored suburb names the way the form's list is cleaned, so "Ascot " and "Ascot" are one suburb."""
+    if 'suburb' in df.columns:
+        # Each distinct name is cleaned once, then mapped onto every row
+        names = {name: normalise_name(name) for name in df['suburb'].unique()}
+        if any(name != cleaned for name, cleaned in names.items()):
+            df['suburb'] = df['suburb'].map(names)
+    return df
+
+
+def compact_dtypes(df):
+    """Shrink a prepared frame: low-cardinality text becomes categorical, ages and bitmasks small ints."""
+    df = df.copy()
+    for column in CATEGORY_COLUMNS + list(MULTISELECT_OPTIONS):
+        if column in df.columns and pd.api.types.is_string_dtype(df[column]):
+            df[column] = df[column].astype("category")
+    if 'age' in df.columns:
+        df['age'] = df['age'].astype("int16")
+    for question in MULTISELECT_OPTIONS:
+        if mask_column(question) in df.columns:
+            df[mask_column(question)] = df[mask_column(question)].astype("int32")
+    return df
+
+
+def append_rows(frame, tail):
+    """Concatenate new rows onto a frame, keeping its categorical columns categorical."""
+    frame, tail = frame.copy(deep=False), tail.copy(deep=False)
+    for column in frame.columns:
+        if column not in tail.columns:
+            continue
+        if pd.api.types.is_integer_dtype(frame[column]) and pd.api.types.is_integer_dtype(tail[column]):
+            tail[column] = tail[column].astype(frame[column].dtype)
+        elif isinstance(frame[column].dtype, pd.CategoricalDtype):
+            categories = frame[column].cat.categories.union(pd.Index(tail[column].dropna().unique()), sort=False)
+            if len(categories) != len(frame[column].cat.categories):
+                frame[column] = frame[column].cat.set_categories(categories)
+            tail[column] = pd.Categorical(tail[column], categories=categories)
+    return pd.concat([frame, tail], ignore_index=True)
+
+
+def frame_bytes(frame, sample=1000):
+    """Estimated memory use of ``frame``, taking text columns' string sizes from a sample of rows."""
+    if frame is None:
+        return 0
+    total = int(frame.index.memory_usage())
+    picks = np.linspace(0, len(frame) - 1, min(len(frame), sample)).astype(int)
+    for column in frame.columns:
+        values = frame[column]
+        if values.dtype == object and len(frame) > sample:
+            # Summing every string's size is as slow as a scan, so scale up a sample
+            total += int(values.iloc[picks].memory_usage(deep=True, index=False) / len(picks) * len(frame))
+        else:
+            total += int(values.memory_usage(deep=True, index=False))
+    return total
+
+
+# Most results memoised per data version; keys include filter selections, so this caps how many combinations are kept
+MEMO_LIMIT = 256
+
+
+def remember(memo, key, value):
+    """Store ``value`` in a memo dict, dropping the oldest entries beyond MEMO_LIMIT."""
+    memo[key] = value
+    while len(memo) > MEMO_LIMIT:
+        del memo[next(key for key in memo if key != "_version")]
+
+
+class ResponseCache:
+    """Keeps the loaded responses in memory and only reads what was added since.
+
+    Meant to be shared between dashboard reruns (e.g. through
+    ``st.cache_resource``). Each ``refresh()`` asks the store for the rows
+    past the last cursor, coerces just those rows and appends them to the
+    cached frame and folds them into the aggregate cube. ``version`` goes up
+    whenever the frame changes, and ``refresh()`` returns the frame together
+    with its version. Another session may refresh the shared cache at any
+    time, so results derived from that frame are memoised under the version
+    returned with it rather than ``self.version``.
+
+    ``rows`` holds every stored row, indexed by its position in the store;
+    ``frame`` holds just the ones not hidden by the audit log, renumbered
+    from 0, and ``positions`` maps them back. Deletes and undos recorded in
+    the audit log are folded into the cubes as row removals and additions.
+    ``trends`` is a second cube over submission day and suburb, kept up to
+    date the same way.
+
+    With a ``snapshot_path`` the first load memory-maps that Parquet snapshot
+    and only reads the rows the store gained since it was written.
+
+    ``refresh(timings)`` adds the seconds it spent on each step to the
+    ``timings`` dict: ``snapshot``, ``read`` (parsing and bitmask encoding
+    happen together in the store), ``prepare`` and ``aggregate``.
+    """
+
+    def __init__(self, store, snapshot_path=None):
+        self.store = store
+        self.snapshot_path = snapshot_path
+        self.audit = AuditLog(store)
+        self.rows = None
+        self.frame = None
+        self.positions = None
+        self.cursor = None
+        self.version = 0
+        self.cube = AggregateCube()
+        self.trends = trend_cube()
+        self.lock = threading.Lock()
+        self._visible = None
+        self._audit_state = None
+        self._filter_index = None
+        self._memo = {}
+        self._snapshot_rows = 0
+        self._memory_usage = (None, 0)
+
+    def refresh(self, timings=None):
+        timings = {} if timings is None else timings
+        with self.lock:
+            if self.rows is None and self.snapshot_path:
+                with timed(timings, "snapshot"):
+                    self._load_snapshot()
+            with timed(timings, "read"):
+                tail, cursor, replaced = self.store.read_since(self.cursor)
+                audit_state = self.audit.state()
+            if replaced or self.rows is None:
+                with timed(timings, "prepare"):
+                    self.rows = prepare_frame(tail)
+                    self._show(self.audit.visible(self.rows.index))
+                with timed(timings, "aggregate"):
+                    self._rebuild_cubes()
+                self.version += 1
+            elif len(tail) or audit_state != self._audit_state:
+                with timed(timings, "prepare"):
+                    tail = prepare_frame(tail)
+                    old_rows, old_visible = len(self.rows), self._visible
+                    if len(tail):
+                        self.rows = append_rows(self.rows, tail)
+                    visible = self.audit.visible(self.rows.index)
+                if audit_state == self._audit_state:
+                    # Only new rows: append the visible ones (nothing hidden means frame is rows)
+                    shown = tail[visible[old_rows:]]
+                    with timed(timings, "prepare"):
+                        if visible.all():
+                            self._show(visible)
+                        else:
+                            self.frame = append_rows(self.frame, shown)
+                            self.positions = np.concatenate([self.positions, np.flatnonzero(visible[old_rows:]) + old_rows])
+                            self._visible = visible
+                    with timed(timings, "aggregate"):
+                        self._update_cubes(shown)
+                else:
+                    # The audit log changed: move just the rows whose visibility flipped in or out of the cube
+                    with timed(timings, "aggregate"):
+                        self._update_cubes(self.rows.iloc[:old_rows][old_visible & ~visible[:old_rows]], sign=-1)
+                        self._update_cubes(self.rows[np.concatenate([~old_visible & visible[:old_rows], visible[old_rows:]])])
+                    with timed(timings, "prepare"):
+                        self._show(visible)
+                self.version += 1
+            self._audit_state = audit_state
+            self.cursor = cursor
+            return self.frame, self.version
+
+    def compact(self, min_new_rows=0):
+        """Write the cached rows out as the new snapshot once enough rows have arrived since the last one."""
+        from nexus_snapshot import write_snapshot
+
+        with self.lock:
+            if self.snapshot_path is None or self.rows is None:
+                return False
+            if len(self.rows) - self._snapshot_rows < max(min_new_rows, 1):
+                return False
+            write_snapshot(self.rows, self.cursor, self.snapshot_path)
+            self._snapshot_rows = len(self.rows)
+            return True
+
+    def _rebuild_cubes(self):
+        self.cube.rebuild(None)
+        self.trends.rebuild(None)
+        self._update_cubes(self.frame)
+
+    def _update_cubes(self, df, sign=1):
+        # Both cubes share the one-hot option counts, which is most of the work
+        if df is None or df.empty:
+            return
+        values = self.cube.counts(df)
+        self.cube.update(df, sign, values)
+        self.trends.update(df, sign, values)
+
+    def _show(self, visible):
+        self._visible = visible
+        if visible.all():
+            self.frame, self.positions = self.rows, np.arange(len(self.rows))
+        else:
+            self.frame = self.rows[visible].reset_index(drop=True)
+            self.positions = np.flatnonzero(visible)
+
+    def _load_snapshot(self):
+        from nexus_snapshot import read_snapshot
+
+        rows, cursor = read_snapshot(self.snapshot_path)
+        if rows is not None:
+            # Snapshots written before names were cleaned on load still hold them as submitted
+            rows = normalise_suburbs(rows)
+            self.rows, self.cursor = rows, cursor
+            self._snapshot_rows = len(rows)
+            self._audit_state = self.audit.state()
+            self._show(self.audit.visible(rows.index))
+            self._rebuild_cubes()
+            self.version += 1
+
+    def memory_usage(self):
+        """Rough bytes held: the loaded rows, the visible copy (which shares their strings) and both cubes."""
+        # Doesn't take the lock, so sizing up a cache never waits on its refresh
+        version, rows, frame = self.version, self.rows, self.frame
+        if self._memory_usage[0] != version:
+            usage = frame_bytes(rows) + self.cube.nbytes + self.trends.nbytes
+            if frame is not None and frame is not rows:
+                usage += int(frame.memory_usage(deep=False).sum())
+            self._memory_usage = (version, usage)
+        return self._memory_usage[1]
+
+    def filter_index(self, frame, version):
+        """The FilterIndex over ``frame``, which ``refresh()`` returned with ``version``."""
+        # Built at most once per data version and shared by every rerun
+        with self.lock:
+            if self._filter_index is not None and self._filter_index[0] == version:
+                return self._filter_index[1]
+        index = FilterIndex(frame)
+        with self.lock:
+            if version == self.version:
+                self._filter_index = (version, index)
+        return index
+
+    def memo(self, key, compute, version):
+        """Return ``compute()`` cached under ``key`` for data ``version``, the one ``refresh()`` returned with its frame."""
+        with self.lock:
+            if self._memo.get("_version") != self.version:
+                self._memo = {"_version": self.version}
+            if version == self.version and key in self._memo:
+                return self._memo[key]
+        result = compute()
+        with self.lock:
+            # A result from a frame that has since been replaced is returned but not kept
+            if version == self.version == self._memo.get("_version"):
+                remember(self._memo, key, result)
+        return result
@@ -0,0 +1,156 @@
+"""Per-stage timing and memory for the Streamlit apps.
+
+Each script run starts a ``Run`` and marks where each stage begins; a stage
+lasts until the next one starts or the run finishes:
+
+    run = start_run("analysis")
+    run.stage("load")
+    ...
+    run.stage("charts")
+    ...
+    run.finish()
+
+Wall time is always recorded. Memory (the peak traced allocation during
+the stage) is recorded while tracemalloc is on, which the debug panel can
+toggle or NEXUS_TRACE_MEMORY=1 turns on at startup; it is process-wide, so
+with several sessions rerunning at once the figures overlap. Totals per stage
+are kept for the process and, if NEXUS_METRICS_DIR is set, written after
+every run to ``<dir>/<app>.prom`` in Prometheus text format (e.g. for the
+node exporter's textfile collector).
+"""
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+METRICS_DIR = os.environ.get("NEXUS_METRICS_DIR")
+
+if os.environ.get("NEXUS_TRACE_MEMORY") == "1" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class Recorder:
+    """Process-wide totals and recent runs for one app."""
+
+    def __init__(self, app, history=20):
+        self.app = app
+        self.runs = deque(maxlen=history)
+        self.totals = {}  # stage -> [count, seconds, max seconds, max peak bytes]
+        self.reruns = 0
+        self.lock = threading.Lock()
+
+    def add(self, stages):
+        with self.lock:
+            self.reruns += 1
+            self.runs.append(stages)
+            for stage, seconds, peak in stages:
+                total = self.totals.setdefault(stage, [0, 0.0, 0.0, 0])
+                total[0] += 1
+                total[1] += seconds
+                total[2] = max(total[2], seconds)
+                total[3] = max(total[3], peak or 0)
+
+    def prometheus(self):
+        """The totals in Prometheus text exposition format."""
+        label = f'app="{self.app}"'
+        lines = [
+            "# HELP nexus_reruns_total Script runs recorded.",
+            "# TYPE nexus_reruns_total counter",
+            f"nexus_reruns_total{{{label}}} {self.reruns}",
+            "# HELP nexus_stage_seconds Wall time spent per stage.",
+            "# TYPE nexus_stage_seconds summary",
+        ]
+        with self.lock:
+            totals = sorted(self.totals.items())
+        for stage, (count, seconds, _, _) in totals:
+            lines.append(f'nexus_stage_seconds_sum{{{label},stage="{stage}"}} {seconds:.6f}')
+            lines.append(f'nexus_stage_seconds_count{{{label},stage="{stage}"}} {count}')
+        lines += ["# HELP nexus_stage_seconds_max Slowest run of each stage.", "# TYPE nexus_stage_seconds_max gauge"]
+        lines += [f'nexus_stage_seconds_max{{{label},stage="{stage}"}} {slowest:.6f}' for stage, (_, _, slowest, _) in totals]
+        lines += ["# HELP nexus_stage_memory_peak_bytes Largest traced allocation peak of each stage.",
+                  "# TYPE nexus_stage_memory_peak_bytes gauge"]
+        lines += [f'nexus_stage_memory_peak_bytes{{{label},stage="{stage}"}} {peak}' for stage, (_, _, _, peak) in totals]
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.app}.prom")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, path)
+
+
+class Run:
+    """The stages of one script run, as ``(stage, seconds, peak bytes or None)``."""
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.stages = []
+        self._stage = None
+        self._started = None
+
+    def stage(self, name):
+        """End the current stage, if any, and start ``name``."""
+        self._close()
+        self._stage, self._started = name, time.perf_counter()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._memory = tracemalloc.get_traced_memory()[0]
+
+    def record(self, timings, prefix=""):
+        """Add stages timed elsewhere, e.g. the ``timings`` filled in by ResponseCache.refresh."""
+        self.stages.extend((prefix + name, seconds, None) for name, seconds in timings.items())
+
+    def finish(self):
+        self._close()
+        self.recorder.add(self.stages)
+        if METRICS_DIR:
+            self.recorder.write(METRICS_DIR)
+        return self.stages
+
+    def _close(self):
+        if self._stage is None:
+            return
+        peak = None
+        if tracemalloc.is_tracing() and self._memory is not None:
+            peak = max(tracemalloc.get_traced_memory()[1] - self._memory, 0)
+        seconds = time.perf_counter() - self._started
+        # A stage entered more than once in a run (e.g. rendering either side of a submit) adds up
+        for position, (name, earlier, earlier_peak) in enumerate(self.stages):
+            if name == self._stage:
+                peak = None if peak is None else max(peak, earlier_peak or 0)
+                self.stages[position] = (name, earlier + seconds, peak)
+                break
+        else:
+            self.stages.append((self._stage, seconds, peak))
+        self._stage, self._memory = None, None
+
+    _memory = None
+
+
+@contextmanager
+def timed(timings, name):
+    """Add the seconds spent in the block to ``timings[name]``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+_recorders = {}
+_recorders_lock = threading.Lock()
+
+
+def get_recorder(app):
+    with _recorders_lock:
+        if app not in _recorders:
+            _recorders[app] = Recorder(app)
+        return _recorders[app]
+
+
+def start_run(app):
+    return Run(get_recorder(app))
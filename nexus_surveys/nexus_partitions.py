@@ -0,0 +1,283 @@
+"""Survey rounds stored side by side, one partition per directory.
+
+    nexus_surveys/databases/
+        nexus_survey_data/responses.csv              the original survey
+        bulawayo/2025-round-1/responses.csv
+        bulawayo/2025-round-1/partition.json         {"survey": "bulawayo", "round": "2025-round-1", "schema_version": 2}
+
+A partition is a directory under the root, at most two levels deep, that
+holds a responses.csv or responses.db. Each one has its own store and the
+audit log, snapshot and spool that go with it. Its manifest records the
+SCHEMA_VERSION the store was last migrated to. The dashboard opens
+partitions through a PartitionCaches, so only the selected ones are ever
+read:
+
+    python nexus_surveys/nexus_partitions.py create bulawayo/2025-round-1 [--db]
+    python nexus_surveys/nexus_partitions.py list
+"""
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from nexus_aggregates import AggregateCube
+from nexus_filters import FilterIndex
+from nexus_loader import ResponseCache, remember
+from nexus_schema import COLUMNS, SCHEMA_VERSION
+from nexus_snapshot import snapshot_path_for
+from nexus_storage import open_store
+from nexus_trends import trend_cube
+
+DEFAULT_RESPONSES_PATH = "nexus_surveys/databases/nexus_survey_data/responses.csv"
+RESPONSES_PATH = os.path.expanduser(os.environ.get("NEXUS_RESPONSES_PATH", DEFAULT_RESPONSES_PATH))
+
+
+def default_partitions_dir(responses_path):
+    """Where partitions live when NEXUS_PARTITIONS_DIR isn't set."""
+    if os.path.normpath(responses_path) == os.path.normpath(DEFAULT_RESPONSES_PATH):
+        # The default responses file's partition sits directly under nexus_surveys/databases
+        return os.path.dirname(os.path.dirname(responses_path))
+    # Anywhere else (e.g. /srv/responses.db) its directory is the root, never the directories above it
+    return os.path.dirname(responses_path) or os.curdir
+
+
+PARTITIONS_DIR = os.path.expanduser(os.environ.get("NEXUS_PARTITIONS_DIR", default_partitions_dir(RESPONSES_PATH)))
+
+MANIFEST = "partition.json"
+RESPONSE_FILES = ("responses.csv", "responses.db")
+
+# Loaded partitions are evicted least recently used first once they hold more than this
+CACHE_BUDGET = int(float(os.environ.get("NEXUS_CACHE_BUDGET_MB", "1024")) * 2**20)
+
+
+class Partition:
+    """One survey round: a responses file and its manifest."""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.manifest_path = os.path.join(os.path.dirname(path), MANIFEST)
+
+    @property
+    def manifest(self):
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    @property
+    def schema_version(self):
+        """The schema version the store was last migrated to, or None if it predates manifests."""
+        return self.manifest.get("schema_version")
+
+    def label(self):
+        manifest = self.manifest
+        parts = [manifest.get("survey"), manifest.get("round")]
+        return " · ".join(part for part in parts if part) or self.name
+
+    def open_store(self, headers=COLUMNS):
+        return open_store(self.path, headers)
+
+    def migrate(self, headers=COLUMNS):
+        """Create the store or add any columns it is missing, and record the current schema version."""
+        store = self.open_store(headers)
+        store.ensure_exists()
+        manifest = self.manifest
+        if manifest.get("schema_version") != SCHEMA_VERSION:
+            manifest["schema_version"] = SCHEMA_VERSION
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        return store
+
+
+def partition_for(path, root=PARTITIONS_DIR):
+    """The Partition a responses file belongs to, named by its directory relative to ``root``."""
+    directory = os.path.dirname(os.path.abspath(path))
+    name = os.path.relpath(directory, os.path.abspath(root))
+    if name.startswith(os.pardir) or name == os.curdir:
+        name = os.path.basename(directory)
+    return Partition(name.replace(os.sep, "/"), path)
+
+
+def list_partitions(root=PARTITIONS_DIR):
+    """Every partition under ``root``, sorted by name."""
+    partitions = []
+    for directory, subdirectories, files in os.walk(root):
+        depth = os.path.relpath(directory, root).count(os.sep) + 1
+        if depth >= 2:
+            subdirectories.clear()
+        for file_name in RESPONSE_FILES:
+            if file_name in files and directory != root:
+                partitions.append(partition_for(os.path.join(directory, file_name), root))
+                break
+    return sorted(partitions, key=lambda partition: partition.name)
+
+
+def create_partition(name, root=PARTITIONS_DIR, survey=None, round=None, backend="csv"):
+    """Create a partition for a new survey round, e.g. ``create_partition("bulawayo/2025-round-1")``."""
+    parts = name.strip("/").split("/")
+    if not 1 <= len(parts) <= 2 or any(part in ("", os.curdir, os.pardir) for part in parts):
+        raise ValueError(f"Partition names are 'survey' or 'survey/round', got {name!r}")
+    directory = os.path.join(root, *parts)
+    if any(os.path.exists(os.path.join(directory, file_name)) for file_name in RESPONSE_FILES):
+        raise ValueError(f"Partition {name!r} already exists")
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"survey": survey or parts[0], "round": round or (parts[1] if len(parts) > 1 else "")}
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    partition = Partition("/".join(parts), os.path.join(directory, f"responses.{backend}"))
+    partition.migrate()
+    return partition
+
+
+class CombinedView:
+    """Several partitions' caches read as one, with the read-only parts of ResponseCache.
+
+    The cubes are merged cell by cell. The frame is the partitions' frames
+    stacked with a leading ``partition`` column, rebuilt only when one of
+    them has changed.
+    """
+
+    def __init__(self, caches):
+        self.caches = caches  # partition name -> ResponseCache
+        self.frame = None
+        self.version = None
+        self.cube = AggregateCube()
+        self.trends = trend_cube()
+        self.lock = threading.Lock()
+        self._memo = {}
+        self._memory_usage = (None, 0)
+
+    def refresh(self, timings=None):
+        # Each partition's frame and version are taken together, as its cache returned them
+        refreshed = {name: cache.refresh(timings) for name, cache in self.caches.items()}
+        with self.lock:
+            version = tuple(version for _, version in refreshed.values())
+            if version != self.version:
+                frames = [frame.assign(partition=name) for name, (frame, _) in refreshed.items()]
+                frame = pd.concat(frames, ignore_index=True)
+                self.frame = frame[["partition"] + [column for column in frame.columns if column != "partition"]]
+                self.cube.rebuild(None)
+                self.trends.rebuild(None)
+                for cache in self.caches.values():
+                    self.cube.merge(cache.cube)
+                    self.trends.merge(cache.trends)
+                self.version, self._memo = version, {}
+            return self.frame, self.version
+
+    def compact(self, min_new_rows=0):
+        return any([cache.compact(min_new_rows) for cache in self.caches.values()])
+
+    def memory_usage(self):
+        # The stacked frame shares its strings with the partitions' own caches, which are counted separately
+        version, frame = self.version, self.frame
+        if self._memory_usage[0] != version:
+            usage = 0 if frame is None else int(frame.memory_usage(deep=False).sum())
+            self._memory_usage = (version, usage + self.cube.nbytes + self.trends.nbytes)
+        return self._memory_usage[1]
+
+    def filter_index(self, frame, version):
+        return self.memo("filter_index", lambda: FilterIndex(frame), version)
+
+    def memo(self, key, compute, version):
+        with self.lock:
+            if version == self.version and key in self._memo:
+                return self._memo[key]
+        result = compute()
+        with self.lock:
+            if self.version == version:
+                remember(self._memo, key, result)
+        return result
+
+
+class PartitionCaches:
+    """Loaded partitions, kept resident least recently used first under a memory budget.
+
+    ``view(partitions)`` returns the ResponseCache of a single partition, or a
+    CombinedView over several. Only those partitions are opened. Sizes are
+    taken from each cache's last refresh. The views in use by the current
+    call are never evicted, so the budget can be exceeded by one selection
+    that is larger than it.
+    """
+
+    def __init__(self, budget=CACHE_BUDGET, headers=COLUMNS):
+        self.budget = budget
+        self.headers = headers
+        self.entries = OrderedDict()  # partition name, or tuple of names for a combined view -> cache
+        self.lock = threading.Lock()
+
+    def view(self, partitions):
+        partitions = sorted(partitions, key=lambda partition: partition.name)
+        names = tuple(partition.name for partition in partitions)
+        with self.lock:
+            caches = {}
+            for partition in partitions:
+                if partition.name not in self.entries:
+                    self.entries[partition.name] = ResponseCache(partition.open_store(self.headers), snapshot_path_for(partition.path))
+                self.entries.move_to_end(partition.name)
+                caches[partition.name] = self.entries[partition.name]
+            if len(names) == 1:
+                view = caches[names[0]]
+            else:
+                if names not in self.entries:
+                    self.entries[names] = CombinedView(caches)
+                self.entries.move_to_end(names)
+                view = self.entries[names]
+            self._evict(set(names) | {names})
+            return view
+
+    def resident(self):
+        """``(key, bytes)`` for each loaded view, least recently used first."""
+        with self.lock:
+            entries = list(self.entries.items())
+        return [(key, cache.memory_usage()) for key, cache in entries]
+
+    def _evict(self, keep):
+        sizes = {key: cache.memory_usage() for key, cache in self.entries.items()}
+        total = sum(sizes.values())
+        for key in list(self.entries):
+            if total <= self.budget:
+                break
+            if key in keep or key not in self.entries:
+                continue
+            total -= sizes[key]
+            del self.entries[key]
+            if isinstance(key, str):
+                # A combined view would keep the evicted partition's cache alive
+                for combined in [other for other in self.entries if isinstance(other, tuple) and key in other]:
+                    total -= sizes[combined]
+                    del self.entries[combined]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage Nexus survey partitions.")
+    parser.add_argument("--root", default=PARTITIONS_DIR, help="directory holding the partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list the partitions and their schema versions")
+    create = commands.add_parser("create", help="create a partition for a new survey round")
+    create.add_argument("name", help="'survey' or 'survey/round'")
+    create.add_argument("--survey", help="survey name to show (defaults to the first part of the name)")
+    create.add_argument("--round", help="round name to show (defaults to the second part of the name)")
+    create.add_argument("--db", action="store_true", help="store responses in SQLite instead of CSV")
+    args = parser.parse_args(argv)
+
+    if args.command == "create":
+        try:
+            partition = create_partition(args.name, args.root, args.survey, args.round, "db" if args.db else "csv")
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+        print(f"Created {partition.path}")
+    else:
+        for partition in list_partitions(args.root):
+            version = partition.schema_version
+            print(f"{partition.name}\t{partition.label()}\tschema {version if version is not None else '?'}\t{partition.path}")
+
+
+if __name__ == "__main__":
+    main()
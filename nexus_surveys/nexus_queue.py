@@ -0,0 +1,107 @@
+"""Write-behind queue between the survey form and the response store.
+
+A submit only appends one JSON line to a spool file next to the store and
+fsyncs it, so the form answers in the same time however large the store is.
+A background thread moves whatever has been spooled into the store as one
+batch (group commit), so a burst of submits costs one store write rather
+than one each. Anything left in the spool by a crash or restart is written
+on the next flush; a batch that was half written is replayed with
+submission-id dedupe, so no response is stored twice.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+
+from nexus_storage import file_lock
+
+
+class SubmissionQueue:
+    """Spool submissions to disk and write them to ``store`` in batches from a background thread."""
+
+    def __init__(self, store, interval=0.5):
+        self.store = store
+        self.interval = interval
+        self.spool_path = store.path + ".spool.jsonl"
+        # The spool is renamed to this while its batch is being written
+        self.batch_path = self.spool_path + ".inflight"
+        # The last failed flush, cleared by the next one that succeeds
+        self.error = None
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def submit(self, response):
+        """Durably enqueue ``response``; once this returns the submission will reach the store."""
+        line = json.dumps(response, default=str) + "\n"
+        with file_lock(self.spool_path):
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        self._wake.set()
+
+    def pending(self):
+        """Number of submissions not yet in the store."""
+        return sum(len(self._read(path)) for path in (self.batch_path, self.spool_path))
+
+    def flush(self):
+        """Write everything spooled so far to the store and return how many rows were written."""
+        # One writer at a time, across processes too
+        with file_lock(self.batch_path):
+            replaying = os.path.exists(self.batch_path)
+            if not replaying:
+                with file_lock(self.spool_path):
+                    if not os.path.exists(self.spool_path) or os.path.getsize(self.spool_path) == 0:
+                        return 0
+                    os.replace(self.spool_path, self.batch_path)
+            responses = self._read(self.batch_path)
+            # A batch left over from a crash may already be partly in the store
+            written = self.store.append_many(responses, dedupe=replaying) if responses else 0
+            os.remove(self.batch_path)
+            return written
+
+    def start(self):
+        """Start the background writer (once per process) and flush on exit."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="nexus-submission-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        # Submits that arrived while the writer's last flush was running are still spooled
+        self.flush()
+
+    def _run(self):
+        while True:
+            try:
+                self.flush()
+                self.error = None
+            except Exception as e:
+                # Keep the spool and try again on the next tick
+                if repr(e) != repr(self.error):
+                    print(f"nexus-submission-writer: could not write to {self.store.path}: {e!r}", file=sys.stderr)
+                self.error = e
+            if self._stopping:
+                return
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _read(self, path):
+        if not os.path.exists(path):
+            return []
+        responses = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    responses.append(json.loads(line))
+                except ValueError:
+                    # A line torn by a crash was never acknowledged
+                    pass
+        return responses
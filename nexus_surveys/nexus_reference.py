@@ -0,0 +1,71 @@
+"""Reference data shared by the survey apps: the suburb list and the logo.
+
+Reading suburbs.xlsx goes through openpyxl and takes a few hundred
+milliseconds, so the cleaned names are compiled to a JSON file next to it
+and that is what gets read. The JSON is rebuilt whenever the spreadsheet's
+modification time or size changes. Within a process both the suburbs and the
+logo are loaded once and shared by every session and rerun.
+"""
+import json
+import os
+from functools import lru_cache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SUBURBS_FILE_PATH = os.path.join(BASE_DIR, "database", "suburbs.xlsx")
+LOGO_PATH = os.path.join(BASE_DIR, "images", "logo9.png")
+
+
+def normalise_name(name):
+    # Trailing and doubled spaces creep into the spreadsheet ("Ascot ")
+    return " ".join(str(name).split())
+
+
+def cache_path_for(xlsx_path):
+    return xlsx_path + ".cache.json"
+
+
+def load_suburbs(path=SUBURBS_FILE_PATH):
+    """Cleaned, de-duplicated suburb names in spreadsheet order, or [] if the file is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return []
+    return list(_load_suburbs(path, stat.st_mtime_ns, stat.st_size))
+
+
+@lru_cache(maxsize=8)
+def _load_suburbs(path, mtime_ns, size):
+    # Keyed on the file's mtime and size, so an edited spreadsheet is picked up without a restart
+    cache_path = cache_path_for(path)
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached["mtime_ns"] == mtime_ns and cached["size"] == size:
+            return tuple(cached["suburbs"])
+    except (OSError, ValueError, KeyError):
+        pass
+    suburbs = _read_spreadsheet(path)
+    try:
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"mtime_ns": mtime_ns, "size": size, "suburbs": suburbs}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # A read-only checkout still works, it just reads the spreadsheet once per process
+        pass
+    return tuple(suburbs)
+
+
+def _read_spreadsheet(path):
+    # pandas and openpyxl are only needed when the JSON cache is stale
+    import pandas as pd
+
+    names = (normalise_name(name) for name in pd.read_excel(path)["suburb"].dropna())
+    return list(dict.fromkeys(name for name in names if name))
+
+
+@lru_cache(maxsize=4)
+def load_logo(path=LOGO_PATH):
+    """The logo's bytes, read once; st.image accepts them directly."""
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,242 @@
+"""Per-suburb reports for planners.
+
+Summarises every question for each suburb in suburbs.xlsx (and any other
+suburb found in the responses) in one run:
+
+    python nexus_surveys/nexus_reports.py nexus_surveys/databases/nexus_survey_data/responses.csv reports/ [--workers 8]
+
+    reports/summary.csv            suburb, question, option, count and share for every suburb
+    reports/index.html             every suburb with its response count
+    reports/suburbs/<name>.html    one page per suburb
+
+The responses are read once, a chunk at a time, into integer columns: suburb
+and single-choice codes, ages and the multiselect bitmasks. The rows are
+sorted by suburb, so each suburb is a contiguous slice, and the columns are
+saved as one .npy file that every worker in a process pool memory-maps, so
+the data is shared through the OS page cache rather than copied into each
+process. Each worker summarises and writes the pages for a batch of suburbs
+and sends back only its rows of summary.csv.
+"""
+import argparse
+import html
+import math
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from nexus_aggregates import AGE_BANDS, age_band_label
+from nexus_audit import visible_chunks
+from nexus_encoding import mask_column
+from nexus_loader import prepare_frame
+from nexus_reference import load_suburbs, normalise_name
+from nexus_schema import QUESTIONS
+from nexus_storage import open_store
+
+SUMMARY_COLUMNS = ["suburb", "question", "option", "count", "share"]
+
+# Questions summarised per suburb, in form order
+REPORT_QUESTIONS = [question for question in QUESTIONS if question.key != "suburb"]
+CODED_COLUMNS = ["suburb"] + [question.key for question in REPORT_QUESTIONS if question.kind in ("select", "radio")]
+
+
+def read_columns(store, suburbs, chunksize=50000):
+    """Read the visible responses into ``(columns, labels)``.
+
+    ``columns`` maps each column name to an int32 array and ``labels`` maps
+    each coded column to the label of every code. Codes follow the suburbs
+    list and the form's option lists, and values missing from those are
+    given new codes at the end.
+    """
+    labels = {column: [] for column in CODED_COLUMNS}
+    labels["suburb"] = list(suburbs)
+    for question in REPORT_QUESTIONS:
+        if question.kind in ("select", "radio"):
+            labels[question.key] = list(question.options)
+    names = CODED_COLUMNS + ["age"] + [question.key for question in REPORT_QUESTIONS if question.kind == "multiselect"]
+    chunks = {name: [] for name in names}
+    for chunk in visible_chunks(store, chunksize):
+        chunk = prepare_frame(chunk)
+        for column in CODED_COLUMNS:
+            values = chunk[column] if column in chunk.columns else pd.Series("", index=chunk.index)
+            chunks[column].append(_codes(values, labels[column]))
+        chunks["age"].append(chunk["age"].to_numpy(dtype="int32") if "age" in chunk.columns else np.zeros(len(chunk), dtype="int32"))
+        for question in REPORT_QUESTIONS:
+            if question.kind == "multiselect":
+                masks = chunk[mask_column(question.key)] if mask_column(question.key) in chunk.columns else pd.Series(0, index=chunk.index)
+                chunks[question.key].append(masks.to_numpy(dtype="int32"))
+    columns = {name: np.concatenate(parts) if parts else np.zeros(0, dtype="int32") for name, parts in chunks.items()}
+    return columns, labels
+
+
+def _codes(values, labels):
+    # Factorise first so names are cleaned once per distinct value rather than per row
+    codes, uniques = pd.factorize(values.astype(str), use_na_sentinel=False)
+    cleaned = [normalise_name(unique) for unique in uniques]
+    known = {label: code for code, label in enumerate(labels)}
+    for name in cleaned:
+        if name not in known:
+            known[name] = len(labels)
+            labels.append(name)
+    return np.array([known[name] for name in cleaned], dtype="int32")[codes]
+
+
+def summarize_suburb(columns, labels, start, stop):
+    """Summary rows ``(question, option, count)`` plus the response count for rows ``start:stop``."""
+    rows, total = [], stop - start
+    for question in REPORT_QUESTIONS:
+        values = columns[question.key][start:stop]
+        if question.kind == "number":
+            lows = np.array([low for low, _ in AGE_BANDS])
+            bands = np.searchsorted(lows, values, side="right") - 1
+            counts = np.bincount(bands[bands >= 0], minlength=len(AGE_BANDS))
+            options = [age_band_label(band) for band in AGE_BANDS]
+        elif question.kind == "multiselect":
+            options = question.options
+            counts = ((values[:, None] >> np.arange(len(options))) & 1).sum(axis=0)
+        else:
+            options = labels[question.key]
+            counts = np.bincount(values, minlength=len(options))
+        rows.extend((question.key, option or "(blank)", int(count)) for option, count in zip(options, counts))
+    return rows, total
+
+
+def write_suburb_page(path, suburb, rows, total, ages):
+    by_question = {}
+    for key, option, count in rows:
+        by_question.setdefault(key, []).append((option, count))
+    parts = [f"<h1>{html.escape(suburb)}</h1>", f"<p>{total} responses"]
+    if total:
+        parts[-1] += f" · average age {int(ages.mean())}"
+    parts[-1] += "</p>"
+    for question in REPORT_QUESTIONS if total else []:
+        parts.append(f"<h2>{html.escape(_plain(question.label))}</h2>")
+        parts.append("<table><tr><th>Option</th><th>Count</th><th>Share</th><th></th></tr>")
+        for option, count in by_question[question.key]:
+            share = count / total
+            parts.append(
+                f"<tr><td>{html.escape(option)}</td><td>{count}</td><td>{share:.0%}</td>"
+                f'<td><div class="bar" style="width:{share * 200:.0f}px"></div></td></tr>'
+            )
+        parts.append("</table>")
+    _write_html(path, suburb, "\n".join(parts))
+
+
+def _plain(label):
+    # Streamlit colour markup such as ":blue[Data]"
+    return re.sub(r":\w+\[([^\]]*)\]", r"\1", label)
+
+
+def _write_html(path, title, body):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>\n"
+            "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1.5em}"
+            "td,th{padding:2px 10px;text-align:left}.bar{background:#1e90ff;height:10px}</style>\n"
+            f"</head><body>\n{body}\n</body></html>\n"
+        )
+
+
+def file_names(suburbs):
+    """A distinct, file-system safe page name for each suburb."""
+    names, seen = [], set()
+    for code, suburb in enumerate(suburbs):
+        name = re.sub(r"[^a-z0-9]+", "-", suburb.lower()).strip("-") or "no-suburb"
+        if name in seen:
+            name = f"{name}-{code}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+# Set in each worker by _attach: the mapped columns and what is needed to find and name each suburb
+_shared = {}
+
+
+def _attach(path, names, labels, offsets, out_dir, page_names):
+    data = np.load(path, mmap_mode="r")
+    _shared.update(columns={name: data[position] for position, name in enumerate(names)}, labels=labels,
+                   offsets=offsets, out_dir=out_dir, page_names=page_names)
+
+
+def _report_batch(batch):
+    """Summarise and write the pages for the suburb codes in ``batch``; returns their summary.csv rows."""
+    columns, labels, offsets = _shared["columns"], _shared["labels"], _shared["offsets"]
+    rows = []
+    for code in batch:
+        start, stop = offsets[code], offsets[code + 1]
+        suburb = labels["suburb"][code] or "(no suburb)"
+        suburb_rows, total = summarize_suburb(columns, labels, start, stop)
+        page_path = os.path.join(_shared["out_dir"], "suburbs", f"{_shared['page_names'][code]}.html")
+        write_suburb_page(page_path, suburb, suburb_rows, total, np.asarray(columns["age"][start:stop]))
+        rows.extend((suburb, key, option, count, count / total if total else 0.0) for key, option, count in suburb_rows)
+    return rows
+
+
+def generate_reports(store, out_dir, suburbs=None, workers=None, chunksize=50000):
+    """Write summary.csv, index.html and a page per suburb to ``out_dir``; returns the number of suburbs."""
+    suburbs = load_suburbs() if suburbs is None else suburbs
+    columns, labels = read_columns(store, suburbs, chunksize)
+    os.makedirs(os.path.join(out_dir, "suburbs"), exist_ok=True)
+
+    # Sort by suburb so every suburb's rows are one slice
+    order = np.argsort(columns["suburb"], kind="stable")
+    counts = np.bincount(columns["suburb"], minlength=len(labels["suburb"]))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    names = list(columns)
+    page_names = file_names([suburb or "(no suburb)" for suburb in labels["suburb"]])
+    codes = list(range(len(labels["suburb"])))
+
+    workers = workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, "columns.npy")
+        data = np.lib.format.open_memmap(data_path, mode="w+", dtype="int32", shape=(len(names), len(order)))
+        for position, name in enumerate(names):
+            data[position] = columns[name][order]
+        data.flush()
+        del data, columns
+        shared = (data_path, names, labels, offsets, out_dir, page_names)
+        if workers == 1:
+            _attach(*shared)
+            results = [_report_batch(codes)]
+            _shared.clear()
+        else:
+            # A few batches per worker keeps them all busy when suburb sizes vary a lot
+            size = max(1, math.ceil(len(codes) / (workers * 4)))
+            batches = [codes[i:i + size] for i in range(0, len(codes), size)]
+            with ProcessPoolExecutor(workers, initializer=_attach, initargs=shared) as pool:
+                results = list(pool.map(_report_batch, batches))
+
+    summary = pd.DataFrame([row for rows in results for row in rows], columns=SUMMARY_COLUMNS)
+    summary.to_csv(os.path.join(out_dir, "summary.csv"), index=False)
+    links = "\n".join(
+        f'<tr><td><a href="suburbs/{page_names[code]}.html">{html.escape(labels["suburb"][code] or "(no suburb)")}</a></td>'
+        f"<td>{counts[code]}</td></tr>"
+        for code in codes
+    )
+    _write_html(os.path.join(out_dir, "index.html"), "Suburb reports",
+                f"<h1>Suburb reports</h1>\n<p>{offsets[-1]} responses</p>\n"
+                f"<table><tr><th>Suburb</th><th>Responses</th></tr>\n{links}\n</table>")
+    return len(codes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a report per suburb from the Nexus survey responses.")
+    parser.add_argument("responses", help="responses file (.csv, or .db for the SQLite store)")
+    parser.add_argument("out_dir", help="directory to write summary.csv, index.html and suburbs/*.html to")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--chunksize", type=int, default=50000, help="rows read per chunk (default: 50000)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.responses):
+        parser.error(f"responses file not found: {args.responses}")
+    count = generate_reports(open_store(args.responses, []), args.out_dir, workers=args.workers, chunksize=args.chunksize)
+    print(f"Wrote reports for {count} suburbs to {args.out_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""The Nexus community survey, declared once.
+
+Every question's column name, label, widget type, options and dashboard
+chart live here. The survey form renders from it, submissions are built and
+validated against it, and the storage, loading and analysis code take their
+column lists and option codes from it. Options are coded by their position
+in a question's list, so only ever append new options. Bump SCHEMA_VERSION
+whenever questions or options change.
+"""
+import uuid
+from datetime import datetime
+
+# 2: added submission_id
+SCHEMA_VERSION = 2
+
+SEPARATOR = ", "
+
+# Client-generated id of each submission, used to drop duplicate uploads
+ID_COLUMN = "submission_id"
+
+
+class Question:
+    """One survey question and, optionally, the dashboard chart summarising it."""
+
+    def __init__(self, key, label, kind, section, options=None, min_value=None, max_value=None,
+                 chart_title=None, chart_filter=None, chart_empty=None):
+        self.key = key
+        self.label = label
+        self.kind = kind  # "select", "radio", "number" or "multiselect"
+        self.section = section
+        self.options = options
+        self.min_value = min_value
+        self.max_value = max_value
+        self.chart_title = chart_title
+        self.chart_filter = chart_filter
+        self.chart_empty = chart_empty
+
+
+QUESTIONS = [
+    # Participant Information
+    Question("suburb", "Select your suburb of residence:", "select", "Participant :blue[Information]"),
+    Question("gender", "Select your gender:", "radio", "Participant :blue[Information]",
+             ["Male", "Female", "Non-binary", "Prefer not to say"]),
+    Question("employment_status", "Select your employment status:", "radio", "Participant :blue[Information]",
+             ["Employed", "Unemployed", "Self-employed", "Student"]),
+    Question("age", "Enter your age:", "number", "Participant :blue[Information]", min_value=0, max_value=120,
+             chart_title="Age Distribution", chart_filter="Select Age Groups:", chart_empty="age groups"),
+
+    # Community Needs and Priorities
+    Question("challenges",
+             "a. What are the biggest challenges or pain points that the community wants the Nexus project to address?",
+             "multiselect", "1. Community :blue[Needs] and :blue[Priorities]",
+             ["Lack of infrastructure", "High unemployment", "Poor public transportation", "Housing affordability",
+              "Water shortages", "Health service access", "Education quality", "Environmental degradation"],
+             chart_title="Challenges Identified", chart_filter="Select Challenges:", chart_empty="challenges"),
+    Question("improvements",
+             "b. What type of improvements or enhancements would residents most likely like to see in the project area?",
+             "multiselect", "1. Community :blue[Needs] and :blue[Priorities]",
+             ["Better road networks", "Improved public transit", "Community parks", "Affordable housing",
+              "Access to clean water", "Healthcare facilities", "Wi-Fi hotspots", "Job training programs"],
+             chart_title="Improvements Suggested", chart_filter="Select Improvements:", chart_empty="improvements"),
+
+    # Existing Community Assets
+    Question("key_assets",
+             "a. What are the key community assets, infrastructure, and resources that Nexus should seek to provide, preserve, and build upon?",
+             "multiselect", "2. Existing :blue[Community] Assets",
+             ["Schools", "Community centers", "Healthcare facilities", "Local markets",
+              "Public parks", "Cultural heritage sites", "Transport links", "Small businesses"],
+             chart_title="Key Community Assets", chart_filter="Select Key Assets:", chart_empty="key assets"),
+    Question("leverage_strengths",
+             "b. How can the project leverage the existing strengths and character of the neighborhood/development area?",
+             "multiselect", "2. Existing :blue[Community] Assets",
+             ["Promote local businesses", "Enhance community events", "Preserve cultural heritage",
+              "Improve public spaces", "Encourage local art and culture", "Strengthen community networks"],
+             chart_title="Leverage Strengths", chart_filter="Select Strengths:", chart_empty="strengths"),
+
+    # Land Use and Development Preferences
+    Question("land_use", "a. What type of land use do community members want to see?",
+             "radio", "3. :blue[Land Use] and Development Preferences",
+             ["Residential", "Commercial", "Mixed Use", "Industrial", "Agricultural"],
+             chart_title="Land Use Preferences", chart_filter="Select Land Use:", chart_empty="land use preferences"),
+    Question("zoning_feedback",
+             "b. How do you feel about the proposed zoning challenges, densities, and building heights for the project area?",
+             "multiselect", "3. :blue[Land Use] and Development Preferences",
+             ["Supportive of higher densities", "Prefer low-rise buildings", "Concerned about traffic impact",
+              "Need more green spaces", "Desire mixed-use developments", "Other"],
+             chart_title="Zoning Feedback", chart_filter="Select Zoning Feedback:", chart_empty="zoning feedback"),
+
+    # Housing and Affordability
+    Question("housing_needs",
+             "a. What are the community's needs and priorities when it comes to housing types, sizes, and affordability levels?",
+             "multiselect", "4. Housing and :blue[Affordability]",
+             ["Low-cost housing", "Medium-density apartments", "Single-family homes", "Shared accommodations",
+              "Student housing", "Elderly housing"],
+             chart_title="Housing Needs", chart_filter="Select Housing Needs:", chart_empty="housing needs"),
+    Question("mix_housing_options",
+             "b. How can the Nexus development plan ensure an appropriate mix of housing options to meet diverse needs?",
+             "multiselect", "4. Housing and :blue[Affordability]",
+             ["Incorporate affordable units", "Include varied sizes", "Ensure accessibility",
+              "Focus on sustainable designs", "Engage local builders", "Promote community input"]),
+
+    # Connectivity and Mobility
+    Question("transport_improvements",
+             "a. What transportation improvements do community members feel are the most important?",
+             "multiselect", "5. Connectivity :blue[and] Mobility",
+             ["Paved roads", "Public bus services", "Bicycle lanes", "Footpaths",
+              "Taxi services", "Improved airport facilities"],
+             chart_title="Transport Improvements", chart_filter="Select Transport Improvements:",
+             chart_empty="transport improvements"),
+    Question("sustainable_mobility",
+             "b. How can the Nexus project promote sustainable, equitable, and accessible mobility options?",
+             "multiselect", "5. Connectivity :blue[and] Mobility",
+             ["Expand public transport", "Encourage carpooling", "Develop bike-sharing programs",
+              "Improve pedestrian safety", "Implement traffic calming measures", "Promote electric vehicles"]),
+
+    # Economic Development and Community Benefits
+    Question("commercial_support",
+             "a. What type of commercial/retail uses, employment opportunities, or economic initiatives would the community support?",
+             "multiselect", "6. :blue[Economic] Development and :blue[Community] Benefits",
+             ["Local markets", "Small and medium enterprises (SMEs)", "Job training programs",
+              "Retail shops", "Agricultural initiatives", "Tourism development"]),
+    Question("maximize_benefits",
+             "b. How can the Nexus plan maximize economic benefits and job creation for residents?",
+             "multiselect", "6. :blue[Economic] Development and :blue[Community] Benefits",
+             ["Support local entrepreneurship", "Create training programs", "Foster partnerships with local businesses",
+              "Attract investment", "Promote tourism", "Ensure fair wages"]),
+
+    # Sustainability and Environmental Impact
+    Question("environmental_concerns",
+             "a. What are the community's key concerns regarding the environmental impact of the Nexus project?",
+             "multiselect", "7. Sustainability and :blue[Environmental] Impact",
+             ["Water pollution", "Deforestation", "Waste management", "Air quality",
+              "Loss of biodiversity", "Climate change adaptation"],
+             chart_title="Environmental Concerns", chart_filter="Select Environmental Concerns:",
+             chart_empty="environmental concerns"),
+    Question("sustainable_design",
+             "b. How can the plan incorporate sustainable design, energy efficiency, and green infrastructure?",
+             "multiselect", "7. Sustainability and :blue[Environmental] Impact",
+             ["Use of renewable energy", "Green building materials", "Water conservation measures",
+              "Community gardens", "Urban forestry", "Recycling programs"]),
+
+    # Community Engagement and Ownership
+    Question("engagement_methods",
+             "a. How can the Nexus project efficiently engage and collaborate with the local community throughout the process?",
+             "multiselect", "8. Community :blue[Engagement] and :blue[Ownership]",
+             ["Community workshops", "Online surveys", "Public meetings", "Social media engagement",
+              "Partnerships with local organizations", "Feedback sessions"],
+             chart_title="Engagement Methods", chart_filter="Select Engagement Methods:", chart_empty="engagement methods"),
+    Question("fostering_ownership",
+             "b. What ideas do community members have for fostering a sense of ownership and stewardship over Nexus initiatives?",
+             "multiselect", "8. Community :blue[Engagement] and :blue[Ownership]",
+             ["Community-led projects", "Volunteer opportunities", "Local advisory boards",
+              "Regular updates and transparency", "Celebrating local culture", "Educational programs"]),
+]
+
+QUESTIONS_BY_KEY = {question.key: question for question in QUESTIONS}
+
+# Column order of the responses file; new columns go on the end so older files can be extended
+COLUMNS = ["timestamp"] + [question.key for question in QUESTIONS] + [ID_COLUMN]
+
+# Columns always read as text, so the dashboard never has to guess their dtype
+TEXT_COLUMNS = ["timestamp", ID_COLUMN] + [question.key for question in QUESTIONS if question.kind != "number"]
+NUMBER_COLUMNS = [question.key for question in QUESTIONS if question.kind == "number"]
+CSV_DTYPES = {column: str for column in TEXT_COLUMNS}
+
+# Single-choice columns with few distinct values
+CATEGORY_COLUMNS = [question.key for question in QUESTIONS if question.kind in ("select", "radio")]
+
+MULTISELECT_OPTIONS = {question.key: question.options for question in QUESTIONS if question.kind == "multiselect"}
+SINGLE_CHOICE_OPTIONS = {question.key: question.options for question in QUESTIONS if question.kind == "radio"}
+
+# Questions that get a chart on the analysis dashboard, in page order
+CHARTED_QUESTIONS = [question for question in QUESTIONS if question.chart_title]
+
+
+def render_form(suburbs):
+    """Draw every question on the Streamlit page, section by section, and return the answers by column."""
+    import streamlit as st
+
+    answers = {}
+    section = None
+    for question in QUESTIONS:
+        if question.section != section:
+            section = question.section
+            st.header(section)
+        if question.kind == "select":
+            answers[question.key] = st.selectbox(question.label, suburbs)
+        elif question.kind == "radio":
+            answers[question.key] = st.radio(question.label, question.options)
+        elif question.kind == "number":
+            answers[question.key] = st.number_input(question.label, min_value=question.min_value,
+                                                    max_value=question.max_value, step=1)
+        else:
+            answers[question.key] = st.multiselect(question.label, question.options)
+    return answers
+
+
+def build_response(answers, timestamp=None, submission_id=None):
+    """Turn form answers into a row for the response store, with a fresh submission id unless given one."""
+    response = {"timestamp": timestamp or datetime.now().isoformat()}
+    for question in QUESTIONS:
+        value = answers.get(question.key)
+        if question.kind == "multiselect":
+            value = SEPARATOR.join(value or []) if not isinstance(value, str) else value
+        response[question.key] = value
+    response[ID_COLUMN] = submission_id or str(uuid.uuid4())
+    return response
+
+
+def validate_response(response, suburbs=None):
+    """Return a list of problems with a response row; an empty list means it is valid."""
+    errors = []
+    for question in QUESTIONS:
+        value = response.get(question.key)
+        if question.kind == "select":
+            if suburbs is not None and str(value).strip() not in suburbs:
+                errors.append(f"{question.key}: unknown suburb {value!r}")
+        elif question.kind == "radio":
+            if value not in question.options:
+                errors.append(f"{question.key}: {value!r} is not one of the options")
+        elif question.kind == "number":
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                errors.append(f"{question.key}: {value!r} is not a number")
+                continue
+            if not question.min_value <= number <= question.max_value:
+                errors.append(f"{question.key}: {value!r} is outside {question.min_value}-{question.max_value}")
+        else:
+            for option in _selected(value, question.options):
+                if option not in question.options:
+                    errors.append(f"{question.key}: unknown option {option!r}")
+    return errors
+
+
+def _selected(value, options):
+    # Parsed exactly as nexus_encoding stores it, keeping the pieces that match no option
+    from nexus_encoding import split_answer
+
+    if value is None or value == "" or (isinstance(value, float) and value != value):
+        return []
+    if not isinstance(value, str):
+        return list(value)
+    return split_answer(value, options, keep_unknown=True)
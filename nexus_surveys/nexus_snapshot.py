@@ -0,0 +1,70 @@
+"""Columnar Parquet snapshots of the response store.
+
+A snapshot holds every response up to some store cursor with typed,
+categorical columns and the encoded multiselect bitmasks, so the dashboard
+can memory-map it and only read the rows appended after it. Compact from
+the command line (e.g. from a scheduled job) with:
+
+    python nexus_surveys/nexus_snapshot.py nexus_surveys/databases/nexus_survey_data/responses.csv
+"""
+import base64
+import json
+import os
+import sys
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from nexus_loader import compact_dtypes, prepare_frame
+from nexus_storage import open_store
+
+CURSOR_KEY = b"nexus.cursor"
+
+
+def snapshot_path_for(store_path):
+    return store_path + ".snapshot.parquet"
+
+
+def write_snapshot(frame, cursor, path):
+    """Write ``frame`` (read up to ``cursor``) as a Parquet snapshot, replacing any previous one atomically."""
+    table = pa.Table.from_pandas(compact_dtypes(frame), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[CURSOR_KEY] = _dump_cursor(cursor).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """Memory-map a snapshot and return ``(frame, cursor)``, or ``(None, None)`` if there is none."""
+    if not os.path.exists(path):
+        return None, None
+    table = pq.read_table(path, memory_map=True)
+    cursor = _load_cursor(table.schema.metadata[CURSOR_KEY].decode("utf-8"))
+    return table.to_pandas(), cursor
+
+
+def compact(store, path):
+    """Fold everything currently in ``store`` into a fresh snapshot."""
+    frame, cursor, _ = store.read_since(None)
+    write_snapshot(prepare_frame(frame), cursor, path)
+    return len(frame)
+
+
+def _dump_cursor(cursor):
+    # Cursors are tuples of ints, bytes and lists; bytes are stored as base64
+    return json.dumps([{"bytes": base64.b64encode(part).decode("ascii")} if isinstance(part, bytes) else part for part in cursor])
+
+
+def _load_cursor(text):
+    return tuple(base64.b64decode(part["bytes"]) if isinstance(part, dict) else part for part in json.loads(text))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        sys.exit("usage: nexus_snapshot.py <responses file> [snapshot file]")
+    store_path = sys.argv[1]
+    snapshot_path = sys.argv[2] if len(sys.argv) == 3 else snapshot_path_for(store_path)
+    rows = compact(open_store(store_path, []), snapshot_path)
+    print(f"Wrote {rows} responses to {snapshot_path}")
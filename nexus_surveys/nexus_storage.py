@@ -0,0 +1,448 @@
+import csv
+import io
+import os
+import sqlite3
+import sys
+from contextlib import closing, contextmanager
+
+import numpy as np
+import pandas as pd
+
+from nexus_encoding import MULTISELECT_OPTIONS, SEPARATOR, decode_column, encode_answer, encode_frame, mask_column
+from nexus_schema import CSV_DTYPES, ID_COLUMN, NUMBER_COLUMNS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on a sidecar ``.lock`` file for the duration of the block.
+
+    The lock lives next to the data file rather than on it, so it stays valid
+    even if the data file itself is replaced.
+    """
+    lock_path = path + ".lock"
+    with open(lock_path, "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class CsvResponseStore:
+    """Append-only survey response store backed by a CSV file.
+
+    New responses are appended to the end of the file under a file lock, so
+    a submission costs the same regardless of how many rows are already
+    stored and concurrent sessions cannot overwrite each other's rows.
+    """
+
+    def __init__(self, path, headers):
+        self.path = path
+        self.headers = list(headers)
+
+    def ensure_exists(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with file_lock(self.path):
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                self._write_rows([self.headers])
+                return
+            missing = [column for column in self.headers if column not in self.read_header()]
+            if missing:
+                self._add_columns(missing)
+
+    def read_header(self):
+        # Only the first line is read, not the whole file
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), None) or self.headers
+
+    def append(self, response):
+        self.append_many([response])
+
+    def append_many(self, responses, dedupe=False):
+        """Append ``responses`` in one write and return how many were written.
+
+        With ``dedupe`` responses whose submission id is already stored, or
+        repeated within the batch, are skipped. That reads the id column, so
+        single form submits leave it off.
+        """
+        with file_lock(self.path):
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                header = self.headers
+                rows = [header]
+                seen = set()
+            else:
+                # Rows follow the column order already in the file
+                header = self.read_header()
+                rows = []
+                seen = self._stored_ids() if dedupe and ID_COLUMN in header else set()
+                if not self._ends_with_newline():
+                    rows.append(None)
+            if dedupe:
+                responses = _unseen(responses, seen)
+            for response in responses:
+                rows.append([self._format(response.get(column)) for column in header])
+            self._write_rows(rows)
+            return len(responses)
+
+    def load(self):
+        """Every stored row, including ones hidden by the audit log (see ``nexus_audit.visible_chunks``)."""
+        with file_lock(self.path):
+            return pd.read_csv(self.path, dtype=CSV_DTYPES)
+
+    def read_since(self, cursor=None):
+        """Read the rows appended after ``cursor``.
+
+        Returns ``(frame, cursor, replaced)``. The cursor records the byte
+        offset already read plus the bytes just before it; if the file shrank
+        or was rewritten the whole file is read again and ``replaced`` is True.
+
+        Like ``iter_chunks`` the lock is only held to take the file's size,
+        and only that many bytes are parsed. The file is opened under the
+        lock too, so a rewrite that replaces it meanwhile isn't seen.
+        """
+        with file_lock(self.path):
+            f = open(self.path, "rb")
+            size = os.fstat(f.fileno()).st_size
+        with f:
+            if cursor is not None:
+                offset, signature, header = cursor
+                f.seek(max(offset - len(signature), 0))
+                if size >= offset and f.read(len(signature)) == signature:
+                    data = f.read(size - offset)
+                    frame = pd.read_csv(io.BytesIO(data), header=None, names=header, dtype=CSV_DTYPES) if data.strip() else pd.DataFrame(columns=header)
+                    return encode_frame(frame), self._cursor(f, size, header), False
+            f.seek(0)
+            frame = pd.read_csv(io.BufferedReader(_BoundedReader(f, size)), dtype=CSV_DTYPES)
+            return encode_frame(frame), self._cursor(f, size, list(frame.columns)), True
+
+    def iter_chunks(self, chunksize=50000, encoded=True, filters=None):
+        """Stream the stored rows in chunks without holding the lock for the whole read.
+
+        Only the bytes present when the read starts are parsed, so a row
+        being appended meanwhile is never seen half-written. Each chunk is
+        indexed by its rows' positions in the store. ``filters`` keeps the
+        rows matching as in SqliteResponseStore.iter_chunks; a CSV has to be
+        parsed in full to apply them.
+        """
+        with file_lock(self.path):
+            size = os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            for chunk in pd.read_csv(io.BufferedReader(_BoundedReader(f, size)), chunksize=chunksize, dtype=CSV_DTYPES):
+                for column, values in (filters or {}).items():
+                    if values:
+                        chunk = chunk[chunk[column].isin(values)]
+                yield encode_frame(chunk) if encoded else chunk
+
+    def retain(self, keep, before_commit=None):
+        """Rewrite the file with only the rows where ``keep(positions)`` is True; returns how many were dropped.
+
+        ``before_commit(removed)`` runs after the new file is written but
+        before it replaces the old one. Appends wait for the lock meanwhile.
+        """
+        with file_lock(self.path):
+            df = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+            mask = keep(np.arange(len(df)))
+            removed = int(len(df) - mask.sum())
+            if removed:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                    df[mask].to_csv(f, index=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if before_commit is not None:
+                    before_commit(removed)
+                os.replace(tmp_path, self.path)
+            return removed
+
+    def _format(self, value):
+        if value is None:
+            return ""
+        if isinstance(value, (list, tuple)):
+            return SEPARATOR.join(value)
+        return value
+
+    def _stored_ids(self):
+        return set(pd.read_csv(self.path, usecols=[ID_COLUMN], dtype=str, keep_default_na=False)[ID_COLUMN])
+
+    def _add_columns(self, columns):
+        # Files written before a column joined the schema are rewritten once with it left empty
+        df = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+        for column in columns:
+            df[column] = ""
+        tmp_path = self.path + ".tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+
+    def _cursor(self, f, size, header):
+        f.seek(max(size - 64, 0))
+        return size, f.read(size - f.tell()), header
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _write_rows(self, rows):
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            for row in rows:
+                if row is None:
+                    f.write("\r\n")
+                else:
+                    writer.writerow(row)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class _BoundedReader(io.RawIOBase):
+    # File wrapper that stops at a fixed size, so readers ignore bytes appended later
+    def __init__(self, f, size):
+        self.f = f
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self.remaining)
+        data = self.f.read(n)
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+class SqliteResponseStore:
+    """Survey response store backed by an embedded SQLite database.
+
+    The database runs in WAL mode so the dashboard can read while the form is
+    writing, and an autoincrementing id lets it read just the rows added since
+    its last refresh. The columns reads can be filtered on are indexed, so a
+    filtered ``iter_chunks`` runs in SQL rather than over the whole table.
+    """
+
+    table = "responses"
+    indexed_columns = ["suburb", "timestamp", "land_use", "age"]
+    # Multiselect answers are stored as bitmasks over the option lists in nexus_encoding
+    integer_columns = [*NUMBER_COLUMNS, *MULTISELECT_OPTIONS]
+
+    def __init__(self, path, headers):
+        self.path = path
+        self.headers = list(headers)
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def ensure_exists(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        column_defs = ", ".join(f'"{column}" {self._column_type(column)}' for column in self.headers)
+        with closing(self.connect()) as conn, conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (id INTEGER PRIMARY KEY AUTOINCREMENT, {column_defs})")
+            existing = list(self.read_header(conn))
+            # Databases created before a column joined the schema get it added empty
+            for column in self.headers:
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE {self.table} ADD COLUMN "{column}" {self._column_type(column)}')
+                    existing.append(column)
+            for column in self.indexed_columns:
+                if column in existing:
+                    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_{column} ON {self.table} ("{column}")')
+            if ID_COLUMN in existing:
+                conn.execute(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{self.table}_{ID_COLUMN} ON {self.table} ("{ID_COLUMN}") '
+                    f"WHERE \"{ID_COLUMN}\" IS NOT NULL AND \"{ID_COLUMN}\" != ''"
+                )
+
+    def read_header(self, conn=None):
+        if conn is None:
+            with closing(self.connect()) as conn:
+                return self.read_header(conn)
+        rows = conn.execute(f"PRAGMA table_info({self.table})").fetchall()
+        return [row[1] for row in rows if row[1] != "id"] or self.headers
+
+    def append(self, response):
+        self.append_many([response])
+
+    def append_many(self, responses, dedupe=False):
+        """Insert ``responses`` in one transaction and return how many were written.
+
+        Responses whose submission id is already stored are always skipped by
+        the unique index; ``dedupe`` is accepted to match the CSV store.
+        """
+        with closing(self.connect()) as conn, conn:
+            header = self.read_header(conn)
+            columns = ", ".join(f'"{column}"' for column in header)
+            placeholders = ", ".join("?" for _ in header)
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO {self.table} ({columns}) VALUES ({placeholders})",
+                ([self._encode(column, response.get(column)) for column in header] for response in responses),
+            )
+            return cursor.rowcount
+
+    def load(self):
+        """Every stored row, including ones hidden by the audit log (see ``nexus_audit.visible_chunks``)."""
+        with closing(self.connect()) as conn:
+            columns = ", ".join(f'"{column}"' for column in self.read_header(conn))
+            df = pd.read_sql_query(f"SELECT {columns} FROM {self.table} ORDER BY id", conn)
+        return self._decode(df, encoded=False)
+
+    def read_since(self, cursor=None):
+        """Read the rows inserted after ``cursor``.
+
+        The cursor is ``(last id, row count)``. If rows up to the last id were
+        deleted in the meantime the whole table is read again and the third
+        item of the returned ``(frame, cursor, replaced)`` is True.
+        """
+        with closing(self.connect()) as conn:
+            last_id, count = cursor or (0, 0)
+            if conn.execute(f"SELECT COUNT(*) FROM {self.table} WHERE id <= ?", (last_id,)).fetchone()[0] != count:
+                last_id, count = 0, 0
+            columns = ", ".join(f'"{column}"' for column in ["id", *self.read_header(conn)])
+            frame = pd.read_sql_query(f"SELECT {columns} FROM {self.table} WHERE id > ? ORDER BY id", conn, params=(last_id,))
+        if len(frame):
+            last_id = int(frame["id"].iloc[-1])
+        cursor = (last_id, count + len(frame))
+        return self._decode(frame.drop(columns="id"), encoded=True), cursor, count == 0
+
+    def iter_chunks(self, chunksize=50000, encoded=True, filters=None):
+        """Stream the stored rows in chunks, each indexed by its rows' positions in the store.
+
+        ``filters`` maps a column to the values it may take, e.g.
+        ``{"suburb": ["Ascot"]}``, and is applied as a WHERE clause.
+        """
+        where, params = self._where(filters)
+        with closing(self.connect()) as conn:
+            # A filtered read skips rows, so positions come from where each id falls among all of them
+            ids = np.array([row[0] for row in conn.execute(f"SELECT id FROM {self.table} ORDER BY id")], dtype="int64") if where else None
+            columns = ", ".join(f'"{column}"' for column in ["id", *self.read_header(conn)])
+            start = 0
+            query = f"SELECT {columns} FROM {self.table}{where} ORDER BY id"
+            for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+                if ids is None:
+                    chunk.index = pd.RangeIndex(start, start + len(chunk))
+                else:
+                    chunk.index = np.searchsorted(ids, chunk["id"].to_numpy())
+                start += len(chunk)
+                yield self._decode(chunk.drop(columns="id"), encoded)
+
+    def retain(self, keep, before_commit=None):
+        """Delete the rows where ``keep(positions)`` is False in one transaction; returns how many were deleted.
+
+        ``before_commit(removed)`` runs inside the transaction, just before it commits.
+        """
+        with closing(self.connect()) as conn, conn:
+            ids = np.array([row[0] for row in conn.execute(f"SELECT id FROM {self.table} ORDER BY id")], dtype="int64")
+            mask = keep(np.arange(len(ids)))
+            removed = ids[~mask]
+            if len(removed):
+                conn.executemany(f"DELETE FROM {self.table} WHERE id = ?", ((int(row_id),) for row_id in removed))
+                if before_commit is not None:
+                    before_commit(len(removed))
+            return len(removed)
+
+    def _column_type(self, column):
+        return "INTEGER" if column in self.integer_columns else "TEXT"
+
+    def _decode(self, df, encoded):
+        for question in MULTISELECT_OPTIONS:
+            if question in df.columns:
+                masks = pd.to_numeric(df[question], errors="coerce").fillna(0).astype("int64")
+                if encoded:
+                    df[mask_column(question)] = masks
+                df[question] = decode_column(masks, question)
+        return df
+
+    def _encode(self, column, value):
+        if column in MULTISELECT_OPTIONS:
+            return encode_answer(value, MULTISELECT_OPTIONS[column])
+        return value
+
+    def _where(self, filters):
+        clauses, params = [], []
+        for column, values in (filters or {}).items():
+            if values:
+                clauses.append(f'"{column}" IN ({", ".join("?" for _ in values)})')
+                params.extend(values)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _unseen(responses, seen):
+    # Responses without a submission id are always kept
+    unseen = []
+    for response in responses:
+        submission_id = response.get(ID_COLUMN)
+        if submission_id:
+            if submission_id in seen:
+                continue
+            seen.add(submission_id)
+        unseen.append(response)
+    return unseen
+
+
+def open_store(path, headers):
+    """Pick a storage backend from the file extension of ``path``."""
+    if os.path.splitext(path)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+        return SqliteResponseStore(path, headers)
+    return CsvResponseStore(path, headers)
+
+
+def import_csv(store, csv_path, chunksize=10000):
+    # Rows the CSV's own audit log hides are left behind
+    from nexus_audit import AuditLog
+
+    audit = AuditLog(CsvResponseStore(csv_path, []))
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=str, keep_default_na=False):
+        visible = audit.visible(np.arange(start, start + len(chunk)))
+        start += len(chunk)
+        store.append_many(chunk[visible].to_dict("records"))
+
+
+def export_csv(store, csv_path, chunksize=50000):
+    # Only the visible rows, as the dashboard's downloads, written a chunk at a time
+    from nexus_audit import visible_chunks
+
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        for position, chunk in enumerate(visible_chunks(store, chunksize, encoded=False)):
+            chunk.to_csv(f, index=False, header=position == 0)
+        if f.tell() == 0:
+            csv.writer(f).writerow(store.read_header())
+
+
+if __name__ == "__main__":
+    # python nexus_surveys/nexus_storage.py import|export <responses.csv> <responses.db>
+    if len(sys.argv) != 4 or sys.argv[1] not in ("import", "export"):
+        sys.exit("usage: nexus_storage.py import|export <csv file> <store file>")
+    command, csv_path, store_path = sys.argv[1:]
+    if command == "import":
+        store = open_store(store_path, pd.read_csv(csv_path, nrows=0).columns)
+        store.ensure_exists()
+        import_csv(store, csv_path)
+    else:
+        # Opening a missing database would create an empty one
+        if not os.path.exists(store_path):
+            sys.exit(f"no such store: {store_path}")
+        export_csv(open_store(store_path, []), csv_path)
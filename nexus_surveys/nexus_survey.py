@@ -1,38 +1,42 @@
 import streamlit as st
-import pandas as pd
-import os
-from datetime import datetime
-from PIL import Image
+from nexus_metrics import start_run
+from nexus_partitions import RESPONSES_PATH, list_partitions, partition_for
+from nexus_queue import SubmissionQueue
+from nexus_reference import load_logo, load_suburbs
+from nexus_schema import COLUMNS, build_response, render_form, validate_response
 
 st.set_page_config(page_title="N.E.X.U.S Survey", initial_sidebar_state="expanded", page_icon="📝", layout="centered")
 
-# Define the CSV file path
-csv_file_path = os.path.expanduser("nexus_surveys/databases/nexus_survey_data/responses.csv")
-csv_dir = os.path.dirname(csv_file_path)
+# Time each stage of the rerun (see nexus_metrics)
+run = start_run("survey")
+run.stage("setup")
 
-# Create the directory if it doesn't exist
-if not os.path.exists(csv_dir):
-    os.makedirs(csv_dir)
-    st.write(f"Created directory: {csv_dir}")
+# Define the responses file path (point NEXUS_RESPONSES_PATH at a .db file to use SQLite).
+# Other survey rounds are reached with ?partition=<survey>/<round>, for partitions created beforehand.
+partition = partition_for(RESPONSES_PATH)
+requested = st.query_params.get("partition")
+if requested and requested != partition.name:
+    partition = next((candidate for candidate in list_partitions() if candidate.name == requested), None)
+    if partition is None:
+        st.error(f"Unknown survey round: {requested}")
+        st.stop()
+csv_file_path = partition.path
 
-# Initialize CSV file with headers if it doesn't exist
-if not os.path.exists(csv_file_path):
-    headers = [
-        "timestamp", "suburb", "gender", "employment_status", "age", "challenges", "improvements", 
-        "key_assets", "leverage_strengths", "land_use", "zoning_feedback", 
-        "housing_needs", "mix_housing_options", "transport_improvements", 
-        "sustainable_mobility", "commercial_support", "maximize_benefits", 
-        "environmental_concerns", "sustainable_design", "engagement_methods", 
-        "fostering_ownership"
-    ]
-    pd.DataFrame(columns=headers).to_csv(csv_file_path, index=False)
+headers = COLUMNS
 
-# Load suburbs from an Excel file
-suburbs_file_path = "nexus_surveys/database/suburbs.xlsx"
-suburbs = []
-if os.path.exists(suburbs_file_path):
-    df = pd.read_excel(suburbs_file_path)
-    suburbs = df['suburb'].dropna().tolist()  # Ensure 'suburb' column exists
+# Submits are spooled to disk and written to the store in batches by one background thread per process.
+# The store is created, or given the columns the schema has gained, once per partition per process: migrating
+# takes the store's lock, which a Compact Storage run holds for the whole rewrite.
+@st.cache_resource
+def get_submission_queue(path, _partition):
+    return SubmissionQueue(_partition.migrate(headers)).start()
+
+submission_queue = get_submission_queue(csv_file_path, partition)
+
+run.stage("reference")
+
+# Load suburbs from the Excel file (cached per process, recompiled when the file changes)
+suburbs = load_suburbs()
 
 if not suburbs:
     st.error("No suburbs available for selection. Please check the suburbs file.")
@@ -44,156 +48,35 @@ else:
     col2.write("*- Prototype developed on 30-08-2024*")
     st.divider()
 
-    # Participant Information
-    st.header("Participant :blue[Information]")
-    suburb = st.selectbox("Select your suburb of residence:", suburbs)
-    gender = st.radio("Select your gender:", ["Male", "Female", "Non-binary", "Prefer not to say"])
-    employment_status = st.radio("Select your employment status:", ["Employed", "Unemployed", "Self-employed", "Student"])
-    age = st.number_input("Enter your age:", min_value=0, max_value=120, step=1)
-
-    # Community Needs and Priorities
-    st.header("1. Community :blue[Needs] and :blue[Priorities]")
-    challenges = st.multiselect(
-        "a. What are the biggest challenges or pain points that the community wants the Nexus project to address?",
-        ["Lack of infrastructure", "High unemployment", "Poor public transportation", "Housing affordability", 
-         "Water shortages", "Health service access", "Education quality", "Environmental degradation"]
-    )
-    improvements = st.multiselect(
-        "b. What type of improvements or enhancements would residents most likely like to see in the project area?",
-        ["Better road networks", "Improved public transit", "Community parks", "Affordable housing", 
-         "Access to clean water", "Healthcare facilities", "Wi-Fi hotspots", "Job training programs"]
-    )
-
-    # Existing Community Assets
-    st.header("2. Existing :blue[Community] Assets")
-    key_assets = st.multiselect(
-        "a. What are the key community assets, infrastructure, and resources that Nexus should seek to provide, preserve, and build upon?",
-        ["Schools", "Community centers", "Healthcare facilities", "Local markets", 
-         "Public parks", "Cultural heritage sites", "Transport links", "Small businesses"]
-    )
-    leverage_strengths = st.multiselect(
-        "b. How can the project leverage the existing strengths and character of the neighborhood/development area?",
-        ["Promote local businesses", "Enhance community events", "Preserve cultural heritage", 
-         "Improve public spaces", "Encourage local art and culture", "Strengthen community networks"]
-    )
-
-    # Land Use and Development Preferences
-    st.header("3. :blue[Land Use] and Development Preferences")
-    land_use = st.radio(
-        "a. What type of land use do community members want to see?",
-        ["Residential", "Commercial", "Mixed Use", "Industrial", "Agricultural"]
-    )
-    zoning_feedback = st.multiselect(
-        "b. How do you feel about the proposed zoning challenges, densities, and building heights for the project area?",
-        ["Supportive of higher densities", "Prefer low-rise buildings", "Concerned about traffic impact", 
-         "Need more green spaces", "Desire mixed-use developments", "Other"]
-    )
-
-    # Housing and Affordability
-    st.header("4. Housing and :blue[Affordability]")
-    housing_needs = st.multiselect(
-        "a. What are the community's needs and priorities when it comes to housing types, sizes, and affordability levels?",
-        ["Low-cost housing", "Medium-density apartments", "Single-family homes", "Shared accommodations", 
-         "Student housing", "Elderly housing"]
-    )
-    mix_housing_options = st.multiselect(
-        "b. How can the Nexus development plan ensure an appropriate mix of housing options to meet diverse needs?",
-        ["Incorporate affordable units", "Include varied sizes", "Ensure accessibility", 
-         "Focus on sustainable designs", "Engage local builders", "Promote community input"]
-    )
-
-    # Connectivity and Mobility
-    st.header("5. Connectivity :blue[and] Mobility")
-    transport_improvements = st.multiselect(
-        "a. What transportation improvements do community members feel are the most important?",
-        ["Paved roads", "Public bus services", "Bicycle lanes", "Footpaths", 
-         "Taxi services", "Improved airport facilities"]
-    )
-    sustainable_mobility = st.multiselect(
-        "b. How can the Nexus project promote sustainable, equitable, and accessible mobility options?",
-        ["Expand public transport", "Encourage carpooling", "Develop bike-sharing programs", 
-         "Improve pedestrian safety", "Implement traffic calming measures", "Promote electric vehicles"]
-    )
-
-    # Economic Development and Community Benefits
-    st.header("6. :blue[Economic] Development and :blue[Community] Benefits")
-    commercial_support = st.multiselect(
-        "a. What type of commercial/retail uses, employment opportunities, or economic initiatives would the community support?",
-        ["Local markets", "Small and medium enterprises (SMEs)", "Job training programs", 
-         "Retail shops", "Agricultural initiatives", "Tourism development"]
-    )
-    maximize_benefits = st.multiselect(
-        "b. How can the Nexus plan maximize economic benefits and job creation for residents?",
-        ["Support local entrepreneurship", "Create training programs", "Foster partnerships with local businesses", 
-         "Attract investment", "Promote tourism", "Ensure fair wages"]
-    )
-
-    # Sustainability and Environmental Impact
-    st.header("7. Sustainability and :blue[Environmental] Impact")
-    environmental_concerns = st.multiselect(
-        "a. What are the community's key concerns regarding the environmental impact of the Nexus project?",
-        ["Water pollution", "Deforestation", "Waste management", "Air quality", 
-         "Loss of biodiversity", "Climate change adaptation"]
-    )
-    sustainable_design = st.multiselect(
-        "b. How can the plan incorporate sustainable design, energy efficiency, and green infrastructure?",
-        ["Use of renewable energy", "Green building materials", "Water conservation measures", 
-         "Community gardens", "Urban forestry", "Recycling programs"]
-    )
-
-    # Community Engagement and Ownership
-    st.header("8. Community :blue[Engagement] and :blue[Ownership]")
-    engagement_methods = st.multiselect(
-        "a. How can the Nexus project efficiently engage and collaborate with the local community throughout the process?",
-        ["Community workshops", "Online surveys", "Public meetings", "Social media engagement", 
-         "Partnerships with local organizations", "Feedback sessions"]
-    )
-    fostering_ownership = st.multiselect(
-        "b. What ideas do community members have for fostering a sense of ownership and stewardship over Nexus initiatives?",
-        ["Community-led projects", "Volunteer opportunities", "Local advisory boards", 
-         "Regular updates and transparency", "Celebrating local culture", "Educational programs"]
-    )
+    # Every question, section by section, as declared in the survey schema
+    run.stage("render")
+    answers = render_form(suburbs)
 
     # Submit Button
     if st.button("Submit Survey"):
         # Collect all responses
-        response_data = {
-            "timestamp": datetime.now().isoformat(),
-            "suburb": suburb,
-            "gender": gender,
-            "employment_status": employment_status,
-            "age": age,
-            "challenges": ', '.join(challenges),
-            "improvements": ', '.join(improvements),
-            "key_assets": ', '.join(key_assets),
-            "leverage_strengths": ', '.join(leverage_strengths),
-            "land_use": land_use,
-            "zoning_feedback": ', '.join(zoning_feedback),
-            "housing_needs": ', '.join(housing_needs),
-            "mix_housing_options": ', '.join(mix_housing_options),
-            "transport_improvements": ', '.join(transport_improvements),
-            "sustainable_mobility": ', '.join(sustainable_mobility),
-            "commercial_support": ', '.join(commercial_support),
-            "maximize_benefits": ', '.join(maximize_benefits),
-            "environmental_concerns": ', '.join(environmental_concerns),
-            "sustainable_design": ', '.join(sustainable_design),
-            "engagement_methods": ', '.join(engagement_methods),
-            "fostering_ownership": ', '.join(fostering_ownership)
-        }
-
-        # Debug: Print response data
-        st.write("Response Data:", response_data)
-
-        # Load existing data and append the new response
-        try:
-            df = pd.read_csv(csv_file_path)
-            st.write("Existing data loaded, shape:", df.shape)  # Check existing data shape
-
-            df.loc[len(df)] = response_data 
-            df.to_csv(csv_file_path, index=False)
-            st.success("Data saved successfully!")
-        except Exception as e:
-            st.error(f"Error saving data: {e}")
+        run.stage("validate")
+        response_data = build_response(answers)
+
+        # Queue the new response; it is safe on disk once submit returns
+        errors = validate_response(response_data, suburbs)
+        if errors:
+            st.error("Invalid response: " + "; ".join(errors))
+        else:
+            run.stage("persist")
+            try:
+                submission_queue.submit(response_data)
+                st.success("Data saved successfully!")
+                if submission_queue.error is not None:
+                    # The response is safe in the spool, but the store is refusing writes
+                    st.warning(
+                        f"{submission_queue.pending()} responses are waiting to be written to the database, "
+                        f"which failed with: {submission_queue.error}"
+                    )
+            except Exception as e:
+                st.error(f"Error saving data: {e}")
+
+        run.stage("render")
 
     st.divider()
 
@@ -201,8 +84,7 @@ else:
 
 with st.sidebar:
     # Display Nexus logo
-    image_path = "nexus_surveys/images/logo9.png"
-    image = Image.open(image_path)
+    image = load_logo()
     with st.container(border=True):
         st.image(image, caption="N.E.X.U.S trademark logo.", width=240)
     st.subheader("About Nexus", divider=True)
@@ -269,3 +151,5 @@ with st.sidebar:
         if selected_option == "Instagram":
             st.info("Find us on IG too")
             st.link_button("Instagram Chat", "https://www.instagram.com/mthoe_saps_construction_tech?igsh=MWZibnVpOWZkcmcyNg==")
+
+run.finish()
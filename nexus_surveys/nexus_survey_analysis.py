@@ -1,45 +1,64 @@
 import streamlit as st
 import pandas as pd
 import os
-from PIL import Image
-import plotly.express as px
+import tracemalloc
+from nexus_aggregates import AGE_BANDS, age_band_label, age_bands, parse_age_bands, top_n
+from nexus_crosstab import cap_table, cooccurrence, crosstab
+from nexus_encoding import MULTISELECT_OPTIONS, mask_column, option_counts
+from nexus_metrics import start_run
+from nexus_partitions import RESPONSES_PATH, PartitionCaches, list_partitions, partition_for
+from nexus_reference import load_logo
+from nexus_schema import CATEGORY_COLUMNS, CHARTED_QUESTIONS, COLUMNS, NUMBER_COLUMNS
+from nexus_trends import trend
+from nexus_viewer import export_csv, export_parquet, page, sort_order
 
 st.set_page_config(page_title="N.E.X.U.S Survey Analysis", initial_sidebar_state="expanded", page_icon="🧠", layout="wide")
 
-# Define the CSV file path
-csv_file_path = os.path.expanduser("nexus_surveys/databases/nexus_survey_data/responses.csv")
-
-# Check if the CSV file exists
-if not os.path.exists(csv_file_path):
-    # Create an empty DataFrame if the file does not exist
-    df = pd.DataFrame(columns=[
-        "timestamp", "suburb", "gender", "age", "challenges", "improvements", 
-        "key_assets", "leverage_strengths", "land_use", "zoning_feedback", 
-        "housing_needs", "mix_housing_options", "transport_improvements", 
-        "sustainable_mobility", "commercial_support", "maximize_benefits", 
-        "environmental_concerns", "sustainable_design", "engagement_methods", 
-        "fostering_ownership"
-    ])
-    df.to_csv(csv_file_path, index=False)
-else:
-    # Load the data from the CSV file
-    df = pd.read_csv(csv_file_path)
-
-    # Convert relevant columns to strings and fill NaN values
-    columns_to_convert = [
-        'challenges', 'improvements', 'key_assets', 
-        'leverage_strengths', 'land_use', 'zoning_feedback', 
-        'housing_needs', 'transport_improvements', 
-        'environmental_concerns', 'engagement_methods'
-    ]
-
-    # Convert all specified columns to string type
-    for column in columns_to_convert:
-        df[column] = df[column].astype(str).fillna('')
-
-    # Convert 'age' column to numeric and handle NaN values
-    if 'age' in df.columns:
-        df['age'] = pd.to_numeric(df['age'], errors='coerce').fillna(0).astype(int)
+# Each survey round is a partition with its own responses file (see nexus_partitions). The default
+# one is NEXUS_RESPONSES_PATH (point it at a .db file to use SQLite) and others sit beside it.
+headers = COLUMNS
+default_partition = partition_for(RESPONSES_PATH)
+
+# Create the responses file with headers if it does not exist
+if not os.path.exists(RESPONSES_PATH):
+    default_partition.migrate(headers)
+
+partitions = {partition.name: partition for partition in list_partitions()}
+partitions.setdefault(default_partition.name, default_partition)
+
+with st.sidebar:
+    st.subheader("Survey :blue[Rounds]", divider=True)
+    selected_partitions = st.multiselect("Show responses from:", sorted(partitions), default=[default_partition.name],
+                                         format_func=lambda name: partitions[name].label())
+    selected_partitions = selected_partitions or [default_partition.name]
+    combined = len(selected_partitions) > 1
+    if not combined:
+        schema_version = partitions[selected_partitions[0]].schema_version
+        st.caption(f"Schema version {schema_version if schema_version is not None else 'unknown'}")
+
+# Keep each loaded round across reruns and only parse rows added since the last one; rounds nobody
+# has looked at lately are dropped once the loaded ones outgrow NEXUS_CACHE_BUDGET_MB.
+# Start from the Parquet snapshot when there is one and refresh it every SNAPSHOT_EVERY new rows.
+SNAPSHOT_EVERY = 10000
+
+@st.cache_resource
+def get_partition_caches():
+    return PartitionCaches(headers=headers)
+
+# Time each stage of the rerun (see nexus_metrics); add ?debug=1 to the URL for the breakdown
+run = start_run("analysis")
+run.stage("load")
+partition_caches = get_partition_caches()
+response_cache = partition_caches.view([partitions[name] for name in selected_partitions])
+load_timings = {}
+# Everything derived from df is memoised under df_version, the version it was read at, since other
+# sessions can refresh the shared cache while this rerun is still running
+df, df_version = response_cache.refresh(load_timings)
+response_cache.compact(min_new_rows=SNAPSHOT_EVERY)
+run.record(load_timings, prefix="load.")
+cube = response_cache.cube
+
+run.stage("header")
 
 # Custom CSS for metrics styling
 st.markdown("""
@@ -64,19 +83,21 @@ with st.container(border=False):
     col1.write("The data is modeled through our :blue[Data Science Algorithms found on our Nexus Engine].")
 
 # Display nexus logo
-image_path = "nexus_surveys/images/logo9.png"
-image = Image.open(image_path)
+image = load_logo()
 with st.container(border=False):
     col2.image(image, caption="N.E.X.U.S trademark logo.", width=240)
 
 st.divider()
 
-# Display metrics
-total_responses = len(df)
-total_unique_suburbs = df['suburb'].nunique()
-average_age = int(df['age'].mean()) if not df['age'].isnull().all() else 0
-total_challenges = df['challenges'].str.split(', ').explode().nunique()
-total_improvements = df['improvements'].str.split(', ').explode().nunique()
+run.stage("metrics")
+
+# Display metrics (read from the aggregate cube rather than rescanning the responses)
+metrics = cube.metrics()
+total_responses = metrics['total_responses']
+total_unique_suburbs = metrics['unique_suburbs']
+average_age = metrics['average_age']
+total_challenges = metrics['total_challenges']
+total_improvements = metrics['total_improvements']
 
 # Styled metrics
 col1, col2, col3, col4, col5 = st.columns(5)
@@ -100,158 +121,287 @@ with col5:
     with st.container():
         st.markdown('<div class="metric-card">Total Improvements: {}</div>'.format(total_improvements), unsafe_allow_html=True)
 
-# Display the raw data
-st.header("Raw :blue[Data]")
-st.write(df)
-
-# Buttons for deleting last entry and clearing database
-col1, col2 = st.columns(2)
+# Exact-match filtering through the precomputed filter index
+run.stage("filter_index")
+filter_index = response_cache.filter_index(df, df_version)
 
-with col1:
-    if st.button(":blue[Delete Last Entry]"):
-        if len(df) > 0:
-            df = df[:-1]  # Remove the last entry
-            df.to_csv(csv_file_path, index=False)
-            st.success("Last entry deleted.")
-        else:
-            st.warning("No entries to delete.")
-
-with col2:
-    if st.button(":orange[Clear Database]"):
-        df = pd.DataFrame(columns=columns_to_convert)
-        df.to_csv(csv_file_path, index=False)
-        st.success("Database cleared.")
-
-# Function to filter data based on user selection
-def filter_data(column, selected_options):
+# Display the raw data one page at a time; sorting and filtering run here rather than in the browser
+run.stage("raw_data")
+st.header("Raw :blue[Data]")
+raw_columns = [column for column in df.columns if not column.endswith("_mask")]
+col1, col2, col3, col4 = st.columns([4, 2, 2, 1])
+shown_columns = col1.multiselect("Columns:", raw_columns, default=raw_columns)
+sort_column = col2.selectbox("Sort by:", raw_columns)
+sort_ascending = col3.radio("Order:", ["Ascending", "Descending"], horizontal=True) == "Ascending"
+page_size = col4.selectbox("Rows per page:", [25, 50, 100, 250], index=1)
+
+col1, col2, col3 = st.columns([2, 4, 1])
+raw_filter_column = col1.selectbox("Filter on:", ["(none)"] + list(filter_index.codes) + list(filter_index.masks))
+raw_filter_values = []
+if raw_filter_column in filter_index.masks:
+    raw_filter_values = col2.multiselect("Values:", MULTISELECT_OPTIONS[raw_filter_column])
+elif raw_filter_column != "(none)":
+    raw_filter_values = col2.multiselect("Values:", sorted(df[raw_filter_column].dropna().unique()))
+page_number = col3.number_input("Page:", min_value=1, value=1, step=1)
+
+# The sort order is cached under df's own version, so paging through it is cheap and an order taken
+# from a frame another session has since shrunk is never applied to this one
+order = response_cache.memo(("sort", sort_column, sort_ascending), lambda: sort_order(df, sort_column, sort_ascending), df_version)
+rows = filter_index.rows(raw_filter_column, raw_filter_values) if raw_filter_values else None
+page_frame, matching, pages = page(df, page_number, page_size, order, rows, shown_columns or raw_columns)
+st.dataframe(page_frame, hide_index=True)
+st.caption(f"Page {min(page_number, pages)} of {pages} · {matching} of {len(df)} responses")
+
+# Downloads and admin actions work on one round's store at a time
+if combined:
+    st.info("Select a single survey round to download its responses or use the admin actions.")
+else:
+    store = response_cache.store
+    # Full downloads stream from the store only when a button is clicked
+    col1, col2 = st.columns(2)
+    col1.download_button("Download CSV", lambda: export_csv(store, shown_columns or None), file_name="responses.csv", mime="text/csv", on_click="ignore")
+    col2.download_button("Download Parquet", lambda: export_parquet(store, shown_columns or None), file_name="responses.parquet", mime="application/octet-stream", on_click="ignore")
+
+    # Buttons for deleting last entry and clearing database. Both are recorded in the
+    # audit log rather than rewriting the store, so they are instant and can be undone.
+    run.stage("admin")
+    audit = response_cache.audit
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        if st.button(":blue[Delete Last Entry]"):
+            if len(df):
+                audit.delete([response_cache.positions[-1]])
+                st.success("Last entry deleted.")
+            else:
+                st.warning("No entries to delete.")
+
+    with col2:
+        if st.button(":orange[Clear Database]"):
+            audit.truncate(len(response_cache.rows))
+            st.success("Database cleared.")
+
+    with col3:
+        if st.button("Undo Last Change"):
+            undone = audit.undo()
+            if undone:
+                st.success(f"Undid the {undone['op']} from {undone['at'][:19]}.")
+            else:
+                st.warning("Nothing to undo.")
+
+    with col4:
+        if st.button("Compact Storage", help="Permanently remove deleted entries from the store. This can't be undone."):
+            st.success(f"Removed {audit.compact()} deleted entries.")
+
+def filter_data(column, selected_options, base=None):
+    base = df if base is None else base
     if selected_options:
-        if df[column].dtype in ['int64', 'float64']:
-            return df[df[column].isin(selected_options)]
-        else:
-            selected_options = [str(option) for option in selected_options]
-            return df[df[column].astype(str).str.contains('|'.join(selected_options), na=False)]
-    return df
+        return base[filter_index.rows(column, selected_options)[base.index]]
+    return base
+
+# Option counts for a question: straight from the cube unless a filter is set
+def question_counts(question, selected_options):
+    if selected_options or cross_filtered is not None:
+        rows = filter_data(question, selected_options, cross_filtered)
+        counts = option_counts(rows[mask_column(question)], question)
+    else:
+        counts = cube.question_counts(question)
+    return counts[counts > 0]
+
+# Response trends. This section reruns on its own; with live updates on it polls the
+# store every few seconds, reading only the rows added since the last poll.
+run.stage("trends")
+st.divider()
+st.header("Response :blue[Trends]")
+col1, col2 = st.columns([1, 3])
+live_updates = col1.toggle("Live updates")
+live_interval = col2.select_slider("Refresh every (seconds):", [5, 10, 30, 60], value=10, disabled=not live_updates)
+
+# A full rerun already refreshed the cache along with df; refreshing again here could move the version on
+# while the rest of the script is still working from df. Only the fragment's own reruns poll for new rows.
+full_rerun = True
+
+@st.fragment(run_every=live_interval if live_updates else None)
+def response_trends():
+    if not full_rerun:
+        response_cache.refresh()
+    trends = response_cache.trends
+    suburbs = [] if trends.cells is None else sorted(set(trends.cells.index.get_level_values("suburb")) - {""})
+    col1, col2, col3 = st.columns([1, 2, 3])
+    trend_freq = col1.radio("Per:", ["day", "week"], horizontal=True)
+    trend_question = col2.selectbox("Show:", ["responses"] + list(MULTISELECT_OPTIONS), format_func=lambda q: q.replace('_', ' ').capitalize())
+    trend_suburbs = col3.multiselect("Suburbs:", suburbs)
+    counts = trend(trends, None if trend_question == "responses" else trend_question, trend_freq, {"suburb": trend_suburbs})
+    if counts.empty:
+        st.warning("No dated responses available for the selected suburbs.")
+        return
+    totals = counts.sum(axis=1)
+    latest = int(totals.iloc[-1])
+    previous = int(totals.iloc[-2]) if len(totals) > 1 else 0
+    st.metric(f"{trend_question.replace('_', ' ').capitalize()} in the {trend_freq} of {totals.index[-1]:%d %b %Y}", latest, latest - previous)
+    st.line_chart(counts)
+
+response_trends()
+full_rerun = False
 
 # Summary Statistics
 st.divider()
 st.header(":blue[Summary] Statistics")
 
-# Age Distribution
-st.subheader("Age Distribution")
-age_filter = st.multiselect("Select Age Groups:", options=df['age'].unique(), default=df['age'].unique())
-filtered_age_data = filter_data('age', age_filter)
+# Cross-filter the charts below on several questions at once
+run.stage("cross_filter")
+with st.expander("Cross-filter responses"):
+    col1, col2 = st.columns(2)
+    combine_with = col1.radio("Combine filters with:", ["AND", "OR"], horizontal=True)
+    option_match = col2.radio("Within a question, match:", ["any", "all"], horizontal=True)
+    cross_filters = {}
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            cross_filters[column] = st.multiselect(f"{column.replace('_', ' ').capitalize()}:", options=sorted(df[column].dropna().unique()), key=f"cross_{column}")
+    for question, options in MULTISELECT_OPTIONS.items():
+        if mask_column(question) in df.columns:
+            cross_filters[question] = st.multiselect(f"{question.replace('_', ' ').capitalize()}:", options=options, key=f"cross_{question}")
+    cross_filters = {column: selected for column, selected in cross_filters.items() if selected}
+    cross_filtered = None
+    if cross_filters:
+        cross_filtered = filter_index.apply(df, cross_filters, how=combine_with.lower(), match=option_match)
+        st.write(f"{len(cross_filtered)} of {len(df)} responses match.")
+
+# Charts and figures are memoised per data version under the filter state that produced them
+cross_key = None
+if cross_filtered is not None:
+    cross_key = (combine_with, option_match, tuple((column, tuple(selected)) for column, selected in sorted(cross_filters.items())))
+
+# Charts with many categories show the largest ones and an "Other" bucket, so payloads stay small
+TOP_N = 20
+
+# plotly is a slow import, so it only loads once the page has drawn its header and metrics
+run.stage("charts")
+import plotly.express as px
 
-# Bar chart for Age Distribution
-if not filtered_age_data.empty:
-    st.bar_chart(filtered_age_data['age'].value_counts().sort_index())
-else:
-    st.warning("No data available for the selected age groups.")
-
-# Pie chart for Age Distribution
-if not filtered_age_data.empty:
-    age_counts = filtered_age_data['age'].value_counts()
-    fig = px.pie(age_counts, values=age_counts.values, names=age_counts.index, 
-                  title="Age Distribution", hover_data=[age_counts.index])
-    st.plotly_chart(fig)
-else:
-    st.warning("No data available for the selected age groups.")
-
-# Challenges Analysis
-st.subheader("Challenges Identified")
-challenges_filter = st.multiselect("Select Challenges:", options=df['challenges'].str.get_dummies(sep=', ').columns.tolist())
-filtered_challenges_data = filter_data('challenges', challenges_filter)
-if not filtered_challenges_data.empty:
-    challenges = filtered_challenges_data['challenges'].str.get_dummies(sep=', ')
-    st.bar_chart(challenges.sum())
-else:
-    st.warning("No data available for the selected challenges.")
-
-# Improvements Analysis
-st.subheader("Improvements Suggested")
-improvements_filter = st.multiselect("Select Improvements:", options=df['improvements'].str.get_dummies(sep=', ').columns.tolist())
-filtered_improvements_data = filter_data('improvements', improvements_filter)
-if not filtered_improvements_data.empty:
-    improvements = filtered_improvements_data['improvements'].str.get_dummies(sep=', ')
-    st.bar_chart(improvements.sum())
-else:
-    st.warning("No data available for the selected improvements.")
-
-# Key Assets Analysis
-st.subheader("Key Community Assets")
-key_assets_filter = st.multiselect("Select Key Assets:", options=df['key_assets'].str.get_dummies(sep=', ').columns.tolist())
-filtered_key_assets_data = filter_data('key_assets', key_assets_filter)
-if not filtered_key_assets_data.empty:
-    key_assets = filtered_key_assets_data['key_assets'].str.get_dummies(sep=', ')
-    st.bar_chart(key_assets.sum())
-else:
-    st.warning("No data available for the selected key assets.")
-
-# Leverage Strengths Analysis
-st.subheader("Leverage Strengths")
-leverage_strengths_filter = st.multiselect("Select Strengths:", options=df['leverage_strengths'].str.get_dummies(sep=', ').columns.tolist())
-filtered_leverage_strengths_data = filter_data('leverage_strengths', leverage_strengths_filter)
-if not filtered_leverage_strengths_data.empty:
-    leverage_strengths = filtered_leverage_strengths_data['leverage_strengths'].str.get_dummies(sep=', ')
-    st.bar_chart(leverage_strengths.sum())
-else:
-    st.warning("No data available for the selected strengths.")
-
-# Land Use Preferences
-st.subheader("Land Use Preferences")
-land_use_filter = st.multiselect("Select Land Use:", options=df['land_use'].unique())
-filtered_land_use_data = filter_data('land_use', land_use_filter)
-if not filtered_land_use_data.empty:
-    land_use_counts = filtered_land_use_data['land_use'].value_counts()
-    st.bar_chart(land_use_counts)
-else:
-    st.warning("No data available for the selected land use preferences.")
-
-# Zoning Feedback
-st.subheader("Zoning Feedback")
-zoning_feedback_filter = st.multiselect("Select Zoning Feedback:", options=df['zoning_feedback'].str.get_dummies(sep=', ').columns.tolist())
-filtered_zoning_data = filter_data('zoning_feedback', zoning_feedback_filter)
-if not filtered_zoning_data.empty:
-    zoning_feedback_counts = filtered_zoning_data['zoning_feedback'].str.get_dummies(sep=', ').sum()
-    st.bar_chart(zoning_feedback_counts)
-else:
-    st.warning("No data available for the selected zoning feedback.")
-
-# Housing Needs Analysis
-st.subheader("Housing Needs")
-housing_needs_filter = st.multiselect("Select Housing Needs:", options=df['housing_needs'].str.get_dummies(sep=', ').columns.tolist())
-filtered_housing_needs_data = filter_data('housing_needs', housing_needs_filter)
-if not filtered_housing_needs_data.empty:
-    housing_needs = filtered_housing_needs_data['housing_needs'].str.get_dummies(sep=', ')
-    st.bar_chart(housing_needs.sum())
-else:
-    st.warning("No data available for the selected housing needs.")
-
-# Transport Improvements
-st.subheader("Transport Improvements")
-transport_improvements_filter = st.multiselect("Select Transport Improvements:", options=df['transport_improvements'].str.get_dummies(sep=', ').columns.tolist())
-filtered_transport_data = filter_data('transport_improvements', transport_improvements_filter)
-if not filtered_transport_data.empty:
-    transport_improvements = filtered_transport_data['transport_improvements'].str.get_dummies(sep=', ')
-    st.bar_chart(transport_improvements.sum())
-else:
-    st.warning("No data available for the selected transport improvements.")
-
-# Environmental Concerns
-st.subheader("Environmental Concerns")
-environmental_concerns_filter = st.multiselect("Select Environmental Concerns:", options=df['environmental_concerns'].str.get_dummies(sep=', ').columns.tolist())
-filtered_environmental_data = filter_data('environmental_concerns', environmental_concerns_filter)
-if not filtered_environmental_data.empty:
-    environmental_concerns = filtered_environmental_data['environmental_concerns'].str.get_dummies(sep=', ')
-    st.bar_chart(environmental_concerns.sum())
+# One chart per charted question in the survey schema
+def chart_data(question, question_filter, bands):
+    """Counts for one chart, plus the pie figure for age."""
+    if question.kind == "multiselect":
+        counts = question_counts(question.key, question_filter)
+    elif question.kind == "number":
+        # Ages are binned into bands here rather than charting every distinct age
+        if cross_filtered is not None:
+            counts = age_bands(cross_filtered[question.key], bands).value_counts(sort=False)
+            counts = counts[counts.index.isin(question_filter) & (counts > 0)]
+        else:
+            counts = cube.dimension_counts("age_band", {"age_band": question_filter}, bands)
+        counts.index = counts.index.astype(str)
+    else:
+        if cross_filtered is not None:
+            counts = filter_data(question.key, question_filter, cross_filtered)[question.key].value_counts()
+        else:
+            counts = cube.dimension_counts(question.key, {question.key: question_filter})
+        counts = top_n(counts, TOP_N)
+    figure = None
+    if question.kind == "number" and not counts.empty:
+        figure = px.pie(counts, values=counts.values, names=counts.index,
+                        title=question.chart_title, hover_data=[counts.index])
+    return counts, figure
+
+for question in CHARTED_QUESTIONS:
+    st.subheader(question.chart_title)
+    bands = AGE_BANDS
+    if question.kind == "multiselect":
+        question_filter = st.multiselect(question.chart_filter, options=question.options)
+    elif question.kind == "number":
+        bands_text = st.text_input("Age bands (lower bounds):", ", ".join(str(low) for low, _ in AGE_BANDS))
+        try:
+            bands = parse_age_bands(bands_text)
+        except ValueError as e:
+            st.warning(f"{e}; using the default bands.")
+        labels = [age_band_label(band) for band in bands]
+        question_filter = st.multiselect(question.chart_filter, options=labels, default=labels)
+    else:
+        # Land use has one value per response; offer the values present in the data
+        question_filter = st.multiselect(question.chart_filter, options=df[question.key].unique())
+    counts, figure = response_cache.memo(
+        ("chart", question.key, tuple(question_filter), tuple(bands), cross_key),
+        lambda: chart_data(question, question_filter, bands),
+        df_version,
+    )
+    if not counts.empty:
+        st.bar_chart(counts)
+    else:
+        st.warning(f"No data available for the selected {question.chart_empty}.")
+
+    # Pie chart for Age Distribution
+    if question.kind == "number":
+        if figure is not None:
+            st.plotly_chart(figure)
+        else:
+            st.warning(f"No data available for the selected {question.chart_empty}.")
+
+# Cross Tabulation
+st.divider()
+st.header("Cross :blue[Tabulation]")
+run.stage("crosstab")
+crosstab_columns = [column for column in CATEGORY_COLUMNS + NUMBER_COLUMNS if column in df.columns]
+crosstab_columns += [question for question in MULTISELECT_OPTIONS if mask_column(question) in df.columns]
+crosstab_data = df if cross_filtered is None else cross_filtered
+
+def crosstab_figure(row, column, share):
+    # Wide columns like suburb keep their largest TOP_N values plus "Other"
+    table = cap_table(crosstab(crosstab_data, row, column), TOP_N)
+    if share == "Row %":
+        table = (table.div(table.sum(axis=1).replace(0, 1), axis=0) * 100).round(1)
+    return px.imshow(table, text_auto=True, aspect="auto", color_continuous_scale="Blues")
+
+col1, col2, col3 = st.columns(3)
+crosstab_row = col1.selectbox("Rows:", crosstab_columns, index=crosstab_columns.index("challenges") if "challenges" in crosstab_columns else 0)
+crosstab_column = col2.selectbox("Columns:", crosstab_columns, index=crosstab_columns.index("suburb") if "suburb" in crosstab_columns else 0)
+crosstab_share = col3.radio("Show:", ["Counts", "Row %"], horizontal=True)
+if crosstab_data.empty:
+    st.warning("No data available for the cross tabulation.")
 else:
-    st.warning("No data available for the selected environmental concerns.")
-
-# Community Engagement Methods
-st.subheader("Engagement Methods")
-engagement_methods_filter = st.multiselect("Select Engagement Methods:", options=df['engagement_methods'].str.get_dummies(sep=', ').columns.tolist())
-filtered_engagement_data = filter_data('engagement_methods', engagement_methods_filter)
-if not filtered_engagement_data.empty:
-    engagement_methods = filtered_engagement_data['engagement_methods'].str.get_dummies(sep=', ')
-    st.bar_chart(engagement_methods.sum())
+    st.plotly_chart(response_cache.memo(
+        ("crosstab", crosstab_row, crosstab_column, crosstab_share, cross_key),
+        lambda: crosstab_figure(crosstab_row, crosstab_column, crosstab_share),
+        df_version,
+    ))
+
+# Option co-occurrence within a multiselect question
+st.subheader("Option Co-occurrence")
+run.stage("cooccurrence")
+multiselect_columns = [question for question in MULTISELECT_OPTIONS if mask_column(question) in df.columns]
+if multiselect_columns and not crosstab_data.empty:
+    cooccurrence_question = st.selectbox("Question:", multiselect_columns)
+    st.plotly_chart(response_cache.memo(
+        ("cooccurrence", cooccurrence_question, cross_key),
+        lambda: px.imshow(cooccurrence(crosstab_data, cooccurrence_question), text_auto=True, aspect="auto", color_continuous_scale="Blues"),
+        df_version,
+    ))
 else:
-    st.warning("No data available for the selected engagement methods.")
+    st.warning("No data available for option co-occurrence.")
+
+stages = run.finish()
+
+# Per-rerun timing and memory breakdown, only shown with ?debug=1
+if st.query_params.get("debug") == "1":
+    st.divider()
+    with st.expander("Performance", expanded=True):
+        trace_memory = st.toggle("Trace memory per stage", value=tracemalloc.is_tracing(),
+                                 help="Uses tracemalloc, which slows the app down while on. Applies from the next rerun.")
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        breakdown = pd.DataFrame(stages, columns=["stage", "seconds", "peak bytes"])
+        breakdown["ms"] = (breakdown.pop("seconds") * 1000).round(1)
+        st.write(f"This rerun: {breakdown.loc[~breakdown['stage'].str.contains('.', regex=False), 'ms'].sum():.0f} ms")
+        st.dataframe(breakdown[["stage", "ms", "peak bytes"]], hide_index=True)
+        recent = pd.DataFrame([{stage: seconds * 1000 for stage, seconds, _ in past} for past in run.recorder.runs])
+        st.write(f"Mean over the last {len(recent)} reruns (ms):")
+        st.dataframe(recent.mean().round(1).rename("ms"))
+        resident = pd.DataFrame(
+            [(" + ".join(key) if isinstance(key, tuple) else key, round(size / 2**20, 1)) for key, size in partition_caches.resident()],
+            columns=["loaded rounds (least recent first)", "MB"],
+        )
+        st.write(f"Cache budget: {partition_caches.budget / 2**20:.0f} MB")
+        st.dataframe(resident, hide_index=True)
+        st.code(run.recorder.prometheus(), language="text")
@@ -0,0 +1,82 @@
+"""Seeded synthetic survey responses for load testing and benchmarks.
+
+Answers are drawn from the real option lists on the survey form and the
+suburbs in database/suburbs.xlsx, with skewed (not uniform) popularity so
+charts and filters behave like they would on real data:
+
+    python nexus_surveys/nexus_synthetic.py 100000 /tmp/responses.csv --seed 7
+"""
+import argparse
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from nexus_encoding import MULTISELECT_OPTIONS, SEPARATOR, SINGLE_CHOICE_OPTIONS, decode_mask
+from nexus_reference import load_suburbs
+from nexus_schema import COLUMNS as HEADERS, ID_COLUMN
+from nexus_storage import open_store
+
+
+def _weights(count, rng):
+    # Zipf-like popularity in a random order, so some options clearly lead
+    weights = 1.0 / np.arange(1, count + 1)
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def generate_responses(count, seed=0, suburbs=None, start="2026-01-01", days=90):
+    """Return ``count`` synthetic responses in the same shape the survey form writes."""
+    rng = np.random.default_rng(seed)
+    suburbs = suburbs if suburbs is not None else load_suburbs()
+    data = {
+        "timestamp": np.datetime_as_string(
+            np.datetime64(start, "s") + np.sort(rng.integers(0, days * 86400, count)), unit="s"
+        ),
+        "suburb": rng.choice(suburbs, count, p=_weights(len(suburbs), rng)),
+        "age": np.clip(rng.normal(36, 14, count).round(), 16, 95).astype(int),
+    }
+    # Seeded stand-ins for the uuid4 the form gives every submission
+    raw = rng.bytes(16 * count)
+    data[ID_COLUMN] = [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+    for question, options in SINGLE_CHOICE_OPTIONS.items():
+        data[question] = rng.choice(options, count, p=_weights(len(options), rng))
+    for question, options in MULTISELECT_OPTIONS.items():
+        # Each option is ticked independently, more popular ones more often
+        picked = rng.random((count, len(options))) < _weights(len(options), rng) * 2.5
+        masks = (picked.astype("int64") << np.arange(len(options))).sum(axis=1)
+        # Decode each distinct mask once and map it onto the rows
+        lookup = {mask: SEPARATOR.join(decode_mask(mask, options)) for mask in np.unique(masks)}
+        data[question] = pd.Series(masks).map(lookup)
+    return pd.DataFrame(data)[HEADERS]
+
+
+def write_responses(df, path, chunksize=50000):
+    """Write generated responses to a new CSV file or SQLite store."""
+    store = open_store(path, HEADERS)
+    if os.path.exists(path):
+        os.remove(path)
+    if os.path.splitext(path)[1].lower() == ".csv":
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        df.to_csv(path, index=False)
+        return
+    store.ensure_exists()
+    for start in range(0, len(df), chunksize):
+        store.append_many(df.iloc[start:start + chunksize].to_dict("records"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Nexus survey responses.")
+    parser.add_argument("count", type=int, help="number of responses to generate")
+    parser.add_argument("output", help="output file (.csv, or .db for the SQLite store); replaced if it exists")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args(argv)
+    write_responses(generate_responses(args.count, args.seed), args.output)
+    print(f"Wrote {args.count} synthetic responses to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
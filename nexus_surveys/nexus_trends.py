@@ -0,0 +1,42 @@
+"""Response trends over submission time.
+
+The trend cube is an AggregateCube broken down by submission day and suburb
+instead of by respondent. The dashboard's ResponseCache folds new responses
+(and deletes) into it the same way as into the main cube, so the daily counts
+never need the full table regrouped. Weeks are summed from the days at query
+time.
+"""
+import pandas as pd
+
+from nexus_aggregates import AggregateCube
+
+TREND_DIMENSIONS = ["day", "suburb"]
+
+FREQUENCIES = {"day": "D", "week": "W-MON"}
+
+
+def trend_cube():
+    return AggregateCube(TREND_DIMENSIONS)
+
+
+def trend(cube, question=None, freq="day", where=None):
+    """Counts per day or week, one column per option of ``question`` or a single "responses" column.
+
+    The index is the start of each period (weeks start on Monday), with
+    empty periods filled in as zeros. ``where`` slices the cube as in
+    AggregateCube.slice, e.g. ``{"suburb": ["Ascot"]}``.
+    """
+    cells = cube.slice(where)
+    if cells is None or cells.empty:
+        return pd.DataFrame()
+    values = cells[[("_", "responses")]].set_axis(["responses"], axis=1) if question is None else cells[question]
+    days = pd.to_datetime(cells.index.get_level_values("day"), format="%Y-%m-%d", errors="coerce")
+    # Rows with a missing or malformed timestamp have no day to go on
+    dated = ~days.isna()
+    values, days = values[dated], days[dated]
+    if values.empty:
+        return pd.DataFrame()
+    if freq == "week":
+        days = days.to_period("W-SUN").start_time
+    counts = values.groupby(days).sum()
+    return counts.asfreq(FREQUENCIES[freq], fill_value=0)
@@ -0,0 +1,66 @@
+"""Paging and export for the dashboard's raw data table.
+
+Only the page being looked at is sent to the browser. Sorting and filtering
+happen on the loaded frame in the dashboard process. Full downloads are read
+from the store a chunk at a time and written to a temporary file rather than
+serialised from the loaded frame, but they are not streamed: Streamlit reads
+the finished file into memory to serve it, so each download holds one copy
+of the whole export while it is being served.
+"""
+import math
+import tempfile
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from nexus_audit import visible_chunks
+from nexus_loader import prepare_frame
+from nexus_schema import COLUMNS, NUMBER_COLUMNS
+
+
+def sort_order(df, column, ascending=True):
+    """Row positions of ``df`` ordered by ``column`` (stable, blanks last)."""
+    values = df[column].reset_index(drop=True)
+    return values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+def page(df, number, size, order=None, rows=None, columns=None):
+    """Return ``(page frame, matching rows, page count)`` for page ``number`` (from 1).
+
+    ``order`` is a sort order from sort_order, ``rows`` an optional boolean
+    row selector and ``columns`` the columns to show.
+    """
+    positions = np.arange(len(df)) if order is None else order
+    if rows is not None:
+        positions = positions[np.asarray(rows)[positions]]
+    pages = max(1, math.ceil(len(positions) / size))
+    number = min(max(number, 1), pages)
+    frame = df.iloc[positions[(number - 1) * size:number * size]]
+    return (frame if columns is None else frame[columns]), len(positions), pages
+
+
+def export_csv(store, columns=None, chunksize=50000):
+    """The store's visible responses as a CSV temporary file, read and written a chunk at a time."""
+    f = tempfile.TemporaryFile()
+    for position, chunk in enumerate(visible_chunks(store, chunksize, encoded=False)):
+        chunk = chunk if columns is None else chunk.reindex(columns=columns)
+        chunk.to_csv(f, index=False, header=position == 0)
+    if f.tell() == 0:
+        f.write((",".join(columns or COLUMNS) + "\n").encode("utf-8"))
+    f.seek(0)
+    return f
+
+
+def export_parquet(store, columns=None, chunksize=50000):
+    """The store's visible responses as a Parquet temporary file, one row group per chunk."""
+    schema = pa.schema([
+        (column, pa.int64() if column in NUMBER_COLUMNS else pa.string()) for column in (columns or COLUMNS)
+    ])
+    f = tempfile.TemporaryFile()
+    with pq.ParquetWriter(f, schema) as writer:
+        for chunk in visible_chunks(store, chunksize, encoded=False):
+            chunk = prepare_frame(chunk.reindex(columns=schema.names))
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    f.seek(0)
+    return f
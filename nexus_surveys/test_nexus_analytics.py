@@ -0,0 +1,24 @@
+"""Tests for the headless analytics CLI."""
+import json
+
+import pytest
+
+from nexus_analytics import main, parse_where
+
+
+def test_where_restricts_the_summary(store, make_response, capsys):
+    store.append_many([make_response(suburb="Ascot", age=20), make_response(suburb="Hillside", age=40),
+                       make_response(suburb="Ascot", age=30, land_use="Commercial")])
+    main([store.path, "--json", "-", "--where", "suburb=Ascot", "--where", "land_use=Residential,Commercial"])
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["metrics"]["total_responses"] == 2
+    assert summary["breakdowns"]["suburb"] == {"Ascot": 2}
+    assert summary["where"] == {"suburb": ["Ascot"], "land_use": ["Residential", "Commercial"]}
+
+
+def test_parse_where_types_numbers_and_rejects_unknown_columns():
+    assert parse_where(["age=30,31", "age=40"]) == {"age": [30, 31, 40]}
+    with pytest.raises(ValueError):
+        parse_where(["challenges=Water shortages"])
+    with pytest.raises(ValueError):
+        parse_where(["suburb"])
@@ -0,0 +1,51 @@
+"""Tests for soft deletes, truncation, undo and compaction through the audit log."""
+from nexus_audit import AuditLog, visible_chunks
+from nexus_loader import ResponseCache
+from nexus_storage import export_csv
+
+
+def test_cache_follows_delete_truncate_undo_and_compact(store, make_response):
+    store.append_many([make_response(age=age) for age in (20, 21, 22, 23)])
+    cache = ResponseCache(store)
+    audit = AuditLog(store)
+
+    def ages():
+        return list(cache.refresh()[0]["age"])
+
+    assert ages() == [20, 21, 22, 23]
+
+    audit.delete([1])
+    assert ages() == [20, 22, 23]
+    assert cache.cube.metrics()["total_responses"] == 3
+
+    audit.truncate(3)
+    assert ages() == [23]
+
+    store.append(make_response(age=24))
+    assert ages() == [23, 24]
+
+    audit.undo()
+    assert ages() == [20, 22, 23, 24]
+    assert cache.cube.metrics()["total_responses"] == 4
+
+    assert audit.compact() == 1
+    assert ages() == [20, 22, 23, 24]
+    assert len(store.load()) == 4
+    # Positions restart after a compaction, and changes before it can no longer be undone
+    assert audit.history() == []
+    audit.delete([0])
+    assert ages() == [22, 23, 24]
+
+
+def test_undo_with_nothing_to_undo(store):
+    assert AuditLog(store).undo() is None
+
+
+def test_hidden_rows_stay_out_of_chunks_and_exports(store, make_response, tmp_path):
+    store.append_many([make_response(age=age) for age in (20, 21, 22)])
+    AuditLog(store).delete([0])
+    assert [list(chunk["age"].astype(int)) for chunk in visible_chunks(store, chunksize=2)] == [[21], [22]]
+
+    AuditLog(store).truncate(3)
+    export_csv(store, str(tmp_path / "export.csv"))
+    assert (tmp_path / "export.csv").read_text().count("\n") == 1
@@ -0,0 +1,60 @@
+"""Tests for exact-match filtering through FilterIndex."""
+import pytest
+
+from nexus_audit import AuditLog
+from nexus_loader import ResponseCache
+
+
+@pytest.fixture
+def cache(store, make_response):
+    store.append_many([
+        make_response(suburb="Ascot", age=20, improvements=["Job training programs"], land_use="Residential"),
+        make_response(suburb="Hillside", age=30, commercial_support=["Job training programs"], land_use="Commercial"),
+        make_response(suburb="Ascot", age=40, improvements=["Job training programs", "Community parks"],
+                      commercial_support=["Small and medium enterprises (SMEs)"], land_use="Commercial"),
+    ])
+    return ResponseCache(store)
+
+
+def ages(cache, filters, **options):
+    frame, version = cache.refresh()
+    return list(cache.filter_index(frame, version).apply(frame, filters, **options)["age"])
+
+
+def test_an_option_only_matches_under_its_own_question(cache):
+    assert ages(cache, {"improvements": ["Job training programs"]}) == [20, 40]
+    assert ages(cache, {"commercial_support": ["Job training programs"]}) == [30]
+
+
+def test_options_with_regex_characters_match_exactly(cache):
+    assert ages(cache, {"commercial_support": ["Small and medium enterprises (SMEs)"]}) == [40]
+
+
+def test_questions_combine_with_and_or_or(cache):
+    filters = {"suburb": ["Ascot"], "land_use": ["Commercial"]}
+    assert ages(cache, filters) == [40]
+    assert ages(cache, filters, how="or") == [20, 30, 40]
+
+
+def test_match_all_needs_every_selected_option(cache):
+    selected = {"improvements": ["Job training programs", "Community parks"]}
+    assert ages(cache, selected) == [20, 40]
+    assert ages(cache, selected, match="all") == [40]
+
+
+def test_unknown_column_is_rejected(cache):
+    with pytest.raises(KeyError):
+        ages(cache, {"favourite_colour": ["Blue"]})
+
+
+def test_index_matches_the_frame_it_was_asked_for(cache, store, make_response):
+    frame, version = cache.refresh()
+    # Another session picks up a new submit and a delete before this rerun builds its index
+    store.append(make_response(suburb="Ascot", age=50))
+    AuditLog(store).delete([1])
+    cache.refresh()
+
+    index = cache.filter_index(frame, version)
+    assert list(index.apply(frame, {"suburb": ["Ascot"]})["age"]) == [20, 40]
+    new_frame, new_version = cache.refresh()
+    assert list(cache.filter_index(new_frame, new_version).apply(new_frame, {"suburb": ["Ascot"]})["age"]) == [20, 40, 50]
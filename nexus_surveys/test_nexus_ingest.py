@@ -0,0 +1,70 @@
+"""Tests for bulk ingest of offline responses."""
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from nexus_ingest import ingest, main, read_batch
+from nexus_schema import ID_COLUMN
+
+SUBURBS = ["Ascot", "Hillside"]
+
+
+def test_valid_batch_is_written_and_reuploads_are_skipped(store, make_response):
+    batch = [make_response(submission_id=str(n)) for n in range(3)]
+    assert ingest(store, batch, SUBURBS) == (3, 0, [])
+    assert ingest(store, batch + [make_response(submission_id="3")], SUBURBS) == (1, 3, [])
+    assert sorted(store.load()[ID_COLUMN]) == ["0", "1", "2", "3"]
+
+
+def test_ids_repeated_within_a_batch_are_written_once(store, make_response):
+    assert ingest(store, [make_response(submission_id="a"), make_response(submission_id="a")], SUBURBS)[0] == 1
+
+
+@pytest.mark.parametrize("change, problem", [
+    ({"suburb": "Atlantis"}, "unknown suburb"),
+    ({"gender": "Robot"}, "not one of the options"),
+    ({"age": "old"}, "not a number"),
+    ({"age": 200}, "outside"),
+    ({"challenges": "Water shortages, Dragons"}, "unknown option 'Dragons'"),
+    ({ID_COLUMN: ""}, f"{ID_COLUMN}: missing"),
+    ({"timestamp": ""}, "timestamp: missing"),
+])
+def test_invalid_responses_are_rejected_and_nothing_is_written(store, make_response, change, problem):
+    batch = [make_response(submission_id="ok"), {**make_response(submission_id="bad"), **change}]
+    written, duplicates, rejected = ingest(store, batch, SUBURBS)
+    assert (written, duplicates) == (0, 0)
+    assert [position for position, _ in rejected] == [2]
+    assert any(problem in error for error in rejected[0][1])
+    assert len(store.load()) == 0
+
+
+def test_skip_invalid_writes_the_valid_responses(store, make_response):
+    batch = [make_response(submission_id="ok"), make_response(suburb="Atlantis", submission_id="bad")]
+    written, _, rejected = ingest(store, batch, SUBURBS, skip_invalid=True)
+    assert written == 1 and len(rejected) == 1
+    assert list(store.load()[ID_COLUMN]) == ["ok"]
+
+
+def test_suburb_names_are_cleaned_before_validation(store, make_response):
+    assert ingest(store, [make_response(suburb=" Ascot ", submission_id="a")], SUBURBS)[0] == 1
+    assert list(store.load()["suburb"]) == ["Ascot"]
+
+
+def test_jsonl_and_csv_batches_read_alike(tmp_path, make_response):
+    responses = [make_response(submission_id=str(n)) for n in range(2)]
+    (tmp_path / "batch.jsonl").write_text("".join(json.dumps(response) + "\n" for response in responses))
+    pd.DataFrame(responses).to_csv(tmp_path / "batch.csv", index=False)
+    from_jsonl, from_csv = read_batch(str(tmp_path / "batch.jsonl")), read_batch(str(tmp_path / "batch.csv"))
+    assert [row[ID_COLUMN] for row in from_jsonl] == [row[ID_COLUMN] for row in from_csv] == ["0", "1"]
+    assert from_csv[0]["challenges"] == "Water shortages"
+
+
+def test_cli_exits_with_an_error_on_invalid_responses(tmp_path, make_response):
+    store_path = str(tmp_path / "responses.db")
+    (tmp_path / "batch.jsonl").write_text(json.dumps({**make_response(submission_id="a"), "gender": "Robot"}) + "\n")
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(tmp_path / "batch.jsonl"), "--store", store_path])
+    assert "nothing was written" in str(exit_info.value)
+    assert not os.path.exists(store_path)
@@ -0,0 +1,33 @@
+"""Tests for ResponseCache and the frame preparation it does on load."""
+import pandas as pd
+
+from nexus_loader import ResponseCache, prepare_frame
+
+
+def test_prepare_frame_cleans_suburb_names():
+    frame = prepare_frame(pd.DataFrame({"suburb": ["Ascot ", "  Ascot", None], "age": ["30", "x", None]}))
+    assert list(frame["suburb"]) == ["Ascot", "Ascot", ""]
+    assert list(frame["age"]) == [30, 0, 0]
+
+
+def test_cache_counts_differently_spaced_names_as_one_suburb(store, make_response):
+    store.append_many([make_response(suburb="Ascot "), make_response(suburb="Ascot")])
+    cache = ResponseCache(store)
+    assert list(cache.refresh()[0]["suburb"]) == ["Ascot", "Ascot"]
+    assert cache.cube.metrics()["unique_suburbs"] == 1
+
+
+def test_memo_keeps_results_only_for_the_version_they_were_computed_from(store, make_response):
+    store.append_many([make_response(age=age) for age in (20, 21, 22)])
+    cache = ResponseCache(store)
+    frame, version = cache.refresh()
+    assert cache.memo("count", lambda: len(frame), version) == 3
+    assert cache.memo("count", lambda: -1, version) == 3
+
+    # Another session's refresh picks up a new row while this one still holds the old frame
+    store.append(make_response(age=23))
+    new_frame, new_version = cache.refresh()
+    assert new_version != version
+    assert cache.memo("count", lambda: len(frame), version) == 3
+    assert cache.memo("count", lambda: len(new_frame), new_version) == 4
+    assert cache.memo("count", lambda: -1, new_version) == 4
@@ -0,0 +1,77 @@
+"""Tests for survey-round partitions and their memory-budgeted caches."""
+import os
+
+import pytest
+
+from nexus_partitions import (CombinedView, PartitionCaches, create_partition, default_partitions_dir,
+                              list_partitions)
+
+
+@pytest.fixture
+def rounds(tmp_path, make_response):
+    """Three partitions with 1, 2 and 3 responses."""
+    partitions = []
+    for count, name in enumerate(["bulawayo/round-1", "bulawayo/round-2", "harare/round-1"], start=1):
+        partition = create_partition(name, str(tmp_path))
+        partition.open_store().append_many([make_response(age=20 + row) for row in range(count)])
+        partitions.append(partition)
+    return partitions
+
+
+def resident(caches):
+    return [key for key, _ in caches.resident()]
+
+
+def test_partitions_are_listed_with_their_manifests(tmp_path, rounds):
+    listed = list_partitions(str(tmp_path))
+    assert [partition.name for partition in listed] == ["bulawayo/round-1", "bulawayo/round-2", "harare/round-1"]
+    assert listed[0].label() == "bulawayo · round-1"
+    assert listed[0].schema_version is not None
+    with pytest.raises(ValueError):
+        create_partition("bulawayo/round-1", str(tmp_path))
+
+
+def test_only_selected_partitions_are_loaded(rounds):
+    caches = PartitionCaches()
+    frame, _ = caches.view([rounds[1]]).refresh()
+    assert len(frame) == 2
+    assert resident(caches) == ["bulawayo/round-2"]
+
+
+def test_least_recently_used_partition_is_evicted_over_budget(rounds):
+    caches = PartitionCaches(budget=2**40)
+    for partition in rounds[:2]:
+        caches.view([partition]).refresh()
+    sizes = dict(caches.resident())
+    caches.budget = sum(sizes.values()) - 1
+    # Touch round 1 so round 2 is the least recently used, then open a third round
+    caches.view([rounds[0]])
+    caches.view([rounds[2]]).refresh()
+    assert resident(caches) == ["bulawayo/round-1", "harare/round-1"]
+
+
+def test_views_in_use_are_kept_even_over_budget(rounds):
+    caches = PartitionCaches(budget=1)
+    caches.view([rounds[0]]).refresh()
+    caches.view([rounds[1]]).refresh()
+    assert resident(caches) == ["bulawayo/round-2"]
+
+
+def test_combined_view_stacks_partitions_and_merges_cubes(rounds):
+    caches = PartitionCaches()
+    view = caches.view(rounds[:2])
+    assert isinstance(view, CombinedView)
+    frame, _ = view.refresh()
+    assert list(frame["partition"]) == ["bulawayo/round-1"] + ["bulawayo/round-2"] * 2
+    assert view.cube.metrics()["total_responses"] == 3
+
+    # Evicting one of its partitions drops the combined view with it
+    caches.budget = 1
+    caches.view([rounds[2]])
+    assert resident(caches) == ["harare/round-1"]
+
+
+def test_partitions_dir_defaults_to_a_custom_responses_files_directory():
+    assert default_partitions_dir("nexus_surveys/databases/nexus_survey_data/responses.csv") == "nexus_surveys/databases"
+    assert default_partitions_dir("/srv/responses.db") == "/srv"
+    assert default_partitions_dir("responses.db") == os.curdir
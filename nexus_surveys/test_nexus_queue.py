@@ -0,0 +1,45 @@
+"""Tests for the write-behind submission queue."""
+import json
+import os
+
+from nexus_queue import SubmissionQueue
+from nexus_schema import ID_COLUMN
+
+
+def test_flush_writes_spooled_submits(store, make_response):
+    queue = SubmissionQueue(store)
+    queue.submit(make_response(age=20))
+    queue.submit(make_response(age=21))
+    assert queue.pending() == 2
+    assert queue.flush() == 2
+    assert queue.pending() == 0
+    assert len(store.load()) == 2
+
+
+def test_half_written_batch_is_replayed_without_duplicates(store, make_response):
+    responses = [make_response(age=age, submission_id=str(age)) for age in (20, 21, 22)]
+    # A crash after the first response of the batch reached the store
+    store.append_many(responses[:1])
+    queue = SubmissionQueue(store)
+    with open(queue.batch_path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(response) + "\n" for response in responses)
+
+    queue.flush()
+    assert not os.path.exists(queue.batch_path)
+    assert sorted(store.load()[ID_COLUMN]) == ["20", "21", "22"]
+
+
+def test_torn_spool_line_is_skipped(store, make_response):
+    queue = SubmissionQueue(store)
+    queue.submit(make_response(age=20))
+    with open(queue.spool_path, "a", encoding="utf-8") as f:
+        f.write('{"suburb": "Asc')
+    assert queue.flush() == 1
+
+
+def test_stop_flushes_what_is_left(store, make_response):
+    queue = SubmissionQueue(store, interval=60).start()
+    queue.submit(make_response())
+    queue.stop()
+    assert queue.pending() == 0
+    assert len(store.load()) == 1
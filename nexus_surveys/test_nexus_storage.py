@@ -0,0 +1,88 @@
+"""Tests for the CSV and SQLite response stores."""
+import os
+import subprocess
+import sys
+from contextlib import closing
+
+import pandas as pd
+
+from nexus_audit import AuditLog, visible_chunks
+from nexus_schema import COLUMNS, ID_COLUMN
+from nexus_storage import CsvResponseStore, open_store
+
+
+def test_append_then_read_since_returns_only_new_rows(store, make_response):
+    store.append_many([make_response(age=20), make_response(age=21)])
+    frame, cursor, replaced = store.read_since(None)
+    assert replaced
+    assert list(frame["age"].astype(int)) == [20, 21]
+
+    store.append(make_response(suburb="Hillside", age=22))
+    frame, cursor, replaced = store.read_since(cursor)
+    assert not replaced
+    assert list(frame["suburb"]) == ["Hillside"]
+    assert "challenges_mask" in frame.columns
+
+    frame, cursor, replaced = store.read_since(cursor)
+    assert not replaced and frame.empty
+
+
+def test_read_since_replaces_after_a_rewrite(store, make_response):
+    store.append_many([make_response(age=age) for age in (20, 21, 22)])
+    _, cursor, _ = store.read_since(None)
+    store.retain(lambda positions: positions != 0)
+    frame, _, replaced = store.read_since(cursor)
+    assert replaced
+    assert list(frame["age"].astype(int)) == [21, 22]
+
+
+def test_append_after_a_file_saved_without_final_newline(tmp_path, make_response):
+    path = tmp_path / "responses.csv"
+    store = CsvResponseStore(str(path), COLUMNS)
+    store.ensure_exists()
+    store.append(make_response(age=20))
+    path.write_bytes(path.read_bytes().rstrip(b"\r\n"))
+
+    store.append(make_response(age=21))
+    assert list(pd.read_csv(path)["age"]) == [20, 21]
+
+
+def test_dedupe_append_creates_a_missing_store(tmp_path, make_response):
+    store = CsvResponseStore(str(tmp_path / "responses.csv"), COLUMNS)
+    written = store.append_many([make_response(submission_id="a"), make_response(submission_id="a")], dedupe=True)
+    assert written == 1
+    assert list(store.load()[ID_COLUMN]) == ["a"]
+
+
+def test_dedupe_skips_stored_ids(store, make_response):
+    store.append_many([make_response(submission_id="a")])
+    store.append_many([make_response(submission_id="a"), make_response(submission_id="b")], dedupe=True)
+    assert sorted(store.load()[ID_COLUMN]) == ["a", "b"]
+
+
+def test_filtered_chunks_keep_store_positions_and_skip_hidden_rows(store, make_response):
+    store.append_many([make_response(suburb=suburb, age=age) for suburb, age in
+                       [("Ascot", 20), ("Hillside", 21), ("Ascot", 22), ("Ascot", 23)]])
+    AuditLog(store).delete([2])
+    chunks = list(visible_chunks(store, chunksize=2, filters={"suburb": ["Ascot"], "age": [20, 22, 23]}))
+    rows = pd.concat(chunks)
+    assert list(rows.index) == [0, 3]
+    assert list(rows["age"].astype(int)) == [20, 23]
+
+
+def test_sqlite_indexes_the_filtered_columns(tmp_path):
+    store = open_store(str(tmp_path / "responses.db"), COLUMNS)
+    store.ensure_exists()
+    with closing(store.connect()) as conn:
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(responses)")}
+        plan = " ".join(str(row) for row in conn.execute("EXPLAIN QUERY PLAN SELECT * FROM responses WHERE suburb IN ('Ascot')"))
+    assert {f"idx_responses_{column}" for column in ("suburb", "timestamp", "land_use", "age")} <= indexes
+    assert "idx_responses_suburb" in plan
+
+
+def test_export_cli_refuses_a_missing_store(tmp_path):
+    missing = tmp_path / "missing.db"
+    result = subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), "nexus_storage.py"),
+                             "export", str(tmp_path / "out.csv"), str(missing)], capture_output=True, text=True)
+    assert result.returncode != 0 and "no such store" in result.stderr
+    assert not missing.exists()
@@ -0,0 +1,56 @@
+"""Tests for the per-day and per-week trend counts."""
+import pandas as pd
+
+from nexus_audit import AuditLog
+from nexus_loader import ResponseCache
+from nexus_trends import trend
+
+
+def submitted(make_response, day, suburb="Ascot", **answers):
+    response = make_response(suburb=suburb, **answers)
+    response["timestamp"] = f"{day}T10:00:00"
+    return response
+
+
+def test_daily_counts_fill_empty_days_and_follow_new_rows(store, make_response):
+    store.append_many([submitted(make_response, "2025-03-03"), submitted(make_response, "2025-03-05", suburb="Hillside")])
+    cache = ResponseCache(store)
+    cache.refresh()
+    counts = trend(cache.trends)
+    assert list(counts["responses"]) == [1, 0, 1]
+    assert counts.index[0] == pd.Timestamp("2025-03-03")
+
+    store.append(submitted(make_response, "2025-03-05"))
+    cache.refresh()
+    assert list(trend(cache.trends)["responses"]) == [1, 0, 2]
+    assert list(trend(cache.trends, where={"suburb": ["Hillside"]})["responses"]) == [1]
+
+
+def test_weekly_option_counts_start_on_monday(store, make_response):
+    store.append_many([
+        submitted(make_response, "2025-03-03", challenges=["Water shortages"]),
+        submitted(make_response, "2025-03-09", challenges=["Water shortages", "High unemployment"]),
+        submitted(make_response, "2025-03-10", challenges=["High unemployment"]),
+    ])
+    cache = ResponseCache(store)
+    cache.refresh()
+    counts = trend(cache.trends, "challenges", "week")
+    assert list(counts.index) == [pd.Timestamp("2025-03-03"), pd.Timestamp("2025-03-10")]
+    assert list(counts["Water shortages"]) == [2, 0]
+    assert list(counts["High unemployment"]) == [1, 1]
+
+
+def test_deleted_responses_leave_the_trend(store, make_response):
+    store.append_many([submitted(make_response, "2025-03-03"), submitted(make_response, "2025-03-03")])
+    cache = ResponseCache(store)
+    cache.refresh()
+    AuditLog(store).delete([0])
+    cache.refresh()
+    assert list(trend(cache.trends)["responses"]) == [1]
+
+
+def test_undated_responses_are_left_out(store, make_response):
+    store.append_many([submitted(make_response, "2025-03-03"), submitted(make_response, "not a date")])
+    cache = ResponseCache(store)
+    cache.refresh()
+    assert trend(cache.trends)["responses"].sum() == 1
@@ -0,0 +1,31 @@
+"""Tests for paging the raw data table."""
+import numpy as np
+
+from nexus_audit import AuditLog
+from nexus_loader import ResponseCache
+from nexus_viewer import page, sort_order
+
+
+def test_page_sorts_filters_and_clamps(store, make_response):
+    store.append_many([make_response(age=age) for age in (40, 20, 30)])
+    frame, _ = ResponseCache(store).refresh()
+    order = sort_order(frame, "age")
+
+    shown, matching, pages = page(frame, 1, 2, order, columns=["age"])
+    assert list(shown["age"]) == [20, 30] and matching == 3 and pages == 2
+
+    shown, matching, pages = page(frame, 9, 2, order, rows=np.array([True, False, True]))
+    assert list(shown["age"]) == [30, 40] and matching == 2 and pages == 1
+
+
+def test_sort_order_is_not_reused_after_another_session_deletes_a_row(store, make_response):
+    store.append_many([make_response(age=age) for age in (40, 20, 30, 10)])
+    cache = ResponseCache(store)
+    frame, version = cache.refresh()
+    cache.memo(("sort", "age", True), lambda: sort_order(frame, "age"), version)
+
+    AuditLog(store).delete([3])
+    frame, version = cache.refresh()
+    order = cache.memo(("sort", "age", True), lambda: sort_order(frame, "age"), version)
+    shown, matching, _ = page(frame, 1, 10, order)
+    assert list(shown["age"]) == [20, 30, 40] and matching == 3